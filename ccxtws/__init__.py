@@ -10,6 +10,16 @@ from ccxtws.mxc import mxc, mxc_observer  # noqa: F401
 from ccxtws.coinex import coinex, coinex_observer  # noqa: F401
 from ccxtws.hitbtc import hitbtc, hitbtc_observer  # noqa: F401
 from ccxtws.binance import binance, binance_observer  # noqa: F401
+from ccxtws.orderbook import OrderBook, BBO, book_callback, bbo_callback  # noqa: F401
+from ccxtws.shard import ShardedExchange  # noqa: F401
+from ccxtws.codec import get_codec  # noqa: F401
+from ccxtws.recorder import Recorder, FrameReader, replay  # noqa: F401
+from ccxtws.metrics import MetricsRegistry  # noqa: F401
+from ccxtws.profiler import StageProfiler  # noqa: F401
+from ccxtws.delivery import queued_callback  # noqa: F401
+from ccxtws.shm import BookPublisher, BookReader  # noqa: F401
+from ccxtws.bus import EventPublisher, EventSubscriber  # noqa: F401
+from ccxtws.consolidated import ConsolidatedBook  # noqa: F401
 
 exchanges_ws = [
     'poloniex', 'poloniex_observer',
@@ -26,4 +36,6 @@ exchanges_ws = [
     'binance', 'binance_observer',
 ]
 
-__all__ = exchanges_ws
+__all__ = exchanges_ws + ['OrderBook', 'BBO', 'book_callback', 'bbo_callback', 'ShardedExchange', 'get_codec', 'Recorder', 'FrameReader', 'replay',
+           'MetricsRegistry', 'StageProfiler', 'queued_callback',
+           'BookPublisher', 'BookReader', 'EventPublisher', 'EventSubscriber', 'ConsolidatedBook']
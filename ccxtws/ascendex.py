@@ -1,4 +1,3 @@
-import json
 import websockets
 from ccxtws.base import Exchange, ExchangeObserver, logger
 
@@ -13,44 +12,47 @@ class ascendex(Exchange):
 
     async def _run(self):
         async with websockets.connect(self.ws_uri) as websocket:
-            self.ws_conn = websocket
-            added_channels = set()
+            self.open_connection(websocket)
             while True:
-                for channel in self.channels:
-                    if channel in added_channels:
-                        continue
-                    added_channels.add(channel)
-                    req = json.dumps({"op": "sub", "ch": f"depth:{channel}"})
-                    await websocket.send(req)
-                    req = json.dumps({"op": "req", "action": "depth-snapshot-top100", "args": {"symbol": channel}})
-                    await websocket.send(req)
-                resp = await websocket.recv()
-                data = json.loads(resp)
-                if data['m'] == 'ping':
-                    req = json.dumps({'op': 'pong'})
-                    await websocket.send(req)
-                elif data['m'] in ['depth-snapshot', 'depth']:
-                    self.notify(data)
-                else:
-                    logger.warning("unknown data %s", data)
+                await self.handle_message(await self.recv(websocket))
+
+    def get_subscribe_messages(self, keys):
+        messages = []
+        for key in keys:
+            messages.append(self.codec.dumps({"op": "sub", "ch": f"depth:{key}"}))
+            messages.append(self.codec.dumps({"op": "req", "action": "depth-snapshot-top100", "args": {"symbol": key}}))
+        return messages
+
+    def get_unsubscribe_messages(self, keys):
+        return [self.codec.dumps({"op": "unsub", "ch": f"depth:{key}"}) for key in keys]
+
+    def on_data(self, data):
+        if data['m'] == 'ping':
+            return self.codec.dumps({'op': 'pong'})
+        if data['m'] in ['depth-snapshot', 'depth']:
+            self.notify(data)
+        else:
+            logger.warning("unknown data %s", data)
 
     async def _ping(self):
-        req = json.dumps({"op": "ping"})
+        req = self.codec.dumps({"op": "ping"})
         await self.ws_conn.send(req)
 
+    def get_timestamp(self, data):
+        return data['data'].get('ts')
+
     def notify(self, data):
+        if not self.accept(data['symbol']):
+            return
         final_data = {'asks': [], 'bids': []}
         if data['m'] == 'depth-snapshot':
             final_data['full'] = True
         else:
             final_data['full'] = False
-        final_data['asks'] = [[float(item[0]), float(item[1])] for item in data['data']['asks']]
-        final_data['bids'] = [[float(item[0]), float(item[1])] for item in data['data']['bids']]
+        final_data['asks'] = self.parse_levels(data['data']['asks'])
+        final_data['bids'] = self.parse_levels(data['data']['bids'])
 
-        for observer in self.observers:
-            if observer.channel != data['symbol']:
-                continue
-            observer.update(final_data)
+        self.dispatch(data['symbol'], final_data, data)
 
 
 class ascendex_observer(ExchangeObserver):
@@ -1,10 +1,52 @@
 import asyncio
+import contextvars
+import random
+import time
+from collections import deque
 from abc import ABCMeta, abstractmethod
 from . import logutils
+from .codec import get_codec
+from .orderbook import BBO
+from .sender import Sender
+from . import utils
 
 logger = logutils.get_logger('ccxtws')
 
 
+class Backpressure:
+    # 每个 Exchange 一个, policy='block' 的 queued_callback 队列满时登记到正在给它喂数据的 Exchange
+    # 只有这个连接的 recv 等待消费者腾出空间, 其它交易所不受影响
+    def __init__(self):
+        self.queues = set()
+        self.event = None
+
+    def block(self, queue):
+        self.queues.add(queue)
+
+    def release(self, queue):
+        self.queues.discard(queue)
+        if not self.queues and self.event is not None:
+            self.event.set()
+
+    async def wait(self):
+        while self.queues:
+            # 每次在当前事件循环里新建, 不会绑定到已经关闭的循环
+            self.event = asyncio.Event()
+            await self.event.wait()
+        self.event = None
+
+
+# 当前正在运行的 Exchange, 在 Exchange.run / replay 里设置, 它创建的 task 都会继承
+# observer 的回调里用它找到数据来自哪个连接, 见 delivery.queued_callback
+current_exchange = contextvars.ContextVar('ccxtws_current_exchange', default=None)
+
+
+def decode_frame(exchange_class, codec_name, resp):
+    # 在线程池/进程池里执行解压和 json 解析, 参数和返回值都要能 pickle
+    data = get_codec(codec_name).loads(exchange_class.decompress(resp))
+    return exchange_class.expand(data, get_codec(codec_name).loads)
+
+
 # https://refactoringguru.cn/design-patterns/observer/python/example
 class ExchangeBoost(metaclass=ABCMeta):
     @abstractmethod
@@ -36,12 +78,239 @@ class Exchange(ExchangeBoost, metaclass=ABCMeta):
     def __init__(self):
         self.ping_sleep_time = 60
         self.observers = []
-        # self.channels = set()
-        # todo: 如何去重
+        # 每个 channel key 只保留一个 channel, 同一个 channel 的多个 observer 只订阅一次
         self.channels = []
+        # channel key -> observers, notify 时按 key 直接查找; 列表为空时删除 key 并退订
+        self.channel_observers = {}
+        # 没有 observer 的 channel 收到的消息数, 这些消息不做深度解析, 见 accept
+        self.dropped = 0
         self.is_running = False
         self.ws_conn = None
+        # 连接建立后创建, 订阅/退订/pong 等上行消息都经过它发送, 接收循环只负责读取和分发
+        self.sender = None
+        self.sender_task = None
+        # 每秒最多发送的消息数, 0 为不限
+        self.send_rate = 0
+        # 当前连接上已经订阅的 channel key
+        self.subscribed = set()
+        # 设置后 recv 收到的原始帧都会写入, 见 recorder.Recorder
+        self.recorder = None
+        # 设置后统计消息数/字节数/延迟等, 见 metrics.MetricsRegistry.track
+        self.metrics = None
+        # 设置后分段统计 recv/解压/json/notify/callback 耗时, 见 profiler.StageProfiler
+        self.profiler = None
         self.max_observers = 0
+        # json 编解码, 默认用已安装的最快实现, 可以按交易所替换: exchange.codec = get_codec('json')
+        self.codec = get_codec()
+        # 深度输出格式: 'list' 为 [[price, volume], ...]; 'numpy' 为 (n, 2) float64 ndarray
+        self.book_format = 'list'
+        # 设置 concurrent.futures 的线程池/进程池后, 解压和 json 解析放到池里执行
+        # 按收到的顺序交给 on_data, 同时最多 max_pending 帧在解析, 见 submit
+        self.executor = None
+        self.max_pending = 64
+        self.pending = None
+        self.pending_event = None
+        self.pending_task = None
+        # 断线重连的等待时间按指数增长并加随机抖动, 连接稳定超过 max_reconnect_delay 后重新从最小值开始
+        self.reconnect_delay = 0.1
+        self.max_reconnect_delay = 30
+        # policy='block' 的队列满时暂停这个连接的读取
+        self.backpressure = Backpressure()
+        # 原生盘口 channel: channel key -> 上一次交给 observer 的 BBO, 见 make_bbo
+        self.last_bbos = {}
+
+    async def recv(self, websocket):
+        if self.backpressure.queues:
+            await self.backpressure.wait()
+        if self.profiler is not None:
+            start = time.perf_counter()
+            resp = await websocket.recv()
+            self.profiler.last_recv = time.perf_counter() - start
+        else:
+            resp = await websocket.recv()
+        if self.recorder is not None:
+            self.recorder.write(resp)
+        if self.metrics is not None:
+            self.metrics.on_recv(resp)
+        return resp
+
+    @staticmethod
+    def decompress(resp):
+        # 解压原始帧, 需要是 staticmethod 才能在进程池里执行
+        return resp
+
+    @staticmethod
+    def expand(data, loads):
+        # json 解析之后的额外解码, 只在 executor 里调用, 如 bibox 的 base64+gzip 内层数据
+        return data
+
+    def on_message(self, resp):
+        # 原始帧 -> 解压 -> json -> on_data, 返回需要回复给服务器的消息 (如 pong)
+        # 回放录制数据时也走这里, 见 recorder.replay
+        if self.profiler is not None and self.profiler.sample():
+            return self.profiler.run(self, resp)
+        return self.on_data(self.codec.loads(self.decompress(resp)))
+
+    def on_data(self, data):
+        self.notify(data)
+
+    def get_timestamp(self, data):
+        # 消息里交易所给的时间戳 (毫秒), 没有则返回 None, 只在开启 metrics 时调用
+        return None
+
+    def accept(self, key):
+        # 解析深度之前按 channel key 过滤, 退订之后或全市场推送里没人订阅的消息直接丢弃
+        if key in self.channel_observers:
+            return True
+        self.dropped += 1
+        if self.metrics is not None:
+            self.metrics.on_drop()
+        return False
+
+    def dispatch(self, key, final_data, data=None):
+        if self.metrics is not None:
+            self.metrics.on_dispatch(key, None if data is None else self.get_timestamp(data))
+        if self.profiler is not None and self.profiler.active:
+            self.profiler.call_observers(self.get_observers(key), final_data)
+            return
+        for observer in self.get_observers(key):
+            observer.update(final_data)
+
+    async def handle_message(self, resp):
+        if self.executor is not None:
+            await self.submit(resp)
+            return
+        try:
+            reply = self.on_message(resp)
+        except Exception:
+            if self.metrics is not None:
+                self.metrics.on_parse_error()
+            raise
+        if reply is not None:
+            await self.reply(reply)
+
+    async def submit(self, resp):
+        loop = asyncio.get_running_loop()
+        if self.pending is None:
+            self.pending = deque()
+            self.pending_event = asyncio.Event()
+            self.pending_task = loop.create_task(self.dispatch_pending())
+        future = loop.run_in_executor(self.executor, decode_frame, type(self), self.codec.name, resp)
+        recv_time = self.metrics.recv_time if self.metrics is not None else 0.0
+        self.pending.append((future, recv_time))
+        self.pending_event.set()
+        if len(self.pending) >= self.max_pending:
+            # 解析跟不上时暂停读取
+            await asyncio.wait([self.pending[0][0]])
+
+    async def dispatch_pending(self):
+        pending = self.pending
+        while True:
+            if not pending:
+                self.pending_event.clear()
+                await self.pending_event.wait()
+                continue
+            future, recv_time = pending[0]
+            try:
+                data = await future
+            except Exception as e:
+                pending.popleft()
+                if self.metrics is not None:
+                    self.metrics.on_parse_error()
+                logger.exception(e)
+                continue
+            pending.popleft()
+            try:
+                if self.metrics is not None:
+                    self.metrics.recv_time = recv_time
+                if self.profiler is not None and self.profiler.sample():
+                    reply = self.profiler.run_data(self, data)
+                else:
+                    reply = self.on_data(data)
+                if reply is not None:
+                    await self.reply(reply)
+            except Exception as e:
+                if self.metrics is not None:
+                    self.metrics.on_parse_error()
+                logger.exception(e)
+
+    def close_pending(self):
+        # 连接断开时丢弃还没处理的帧, 避免重连后旧数据覆盖 wipe_cache
+        if self.pending_task is not None:
+            self.pending_task.cancel()
+            for future, _ in self.pending:
+                future.cancel()
+        self.pending = None
+        self.pending_task = None
+
+    def open_connection(self, websocket):
+        # 连接 (以及 kucoin 的 welcome 等握手) 完成后调用, 订阅已有的 channel
+        self.ws_conn = websocket
+        self.sender = Sender(websocket, self.send_rate)
+        self.sender_task = asyncio.create_task(self.sender.run())
+        self.subscribed = set()
+        # 重连后每个盘口重新推送一次
+        self.last_bbos = {}
+        self.on_open()
+        self.send_subscribe(self.channels)
+
+    def close_connection(self):
+        if self.sender_task is not None:
+            self.sender_task.cancel()
+        self.sender = None
+        self.sender_task = None
+        self.subscribed = set()
+
+    def on_open(self):
+        # 订阅之前需要发送的消息, 如 binance 的 SET_PROPERTY
+        pass
+
+    def get_subscribe_messages(self, keys):
+        # 返回订阅 keys 需要发送的消息列表
+        return []
+
+    def get_unsubscribe_messages(self, keys):
+        # 返回退订 keys 需要发送的消息列表
+        return []
+
+    def send_subscribe(self, channels):
+        keys = []
+        for channel in channels:
+            key = self.get_channel_key(channel)
+            if key is None or key in self.subscribed:
+                continue
+            self.subscribed.add(key)
+            keys.append(key)
+        if keys:
+            for msg in self.get_subscribe_messages(keys):
+                self.sender.send(msg)
+
+    def send_unsubscribe(self, keys):
+        keys = [key for key in keys if key in self.subscribed]
+        if keys:
+            self.subscribed.difference_update(keys)
+            for msg in self.get_unsubscribe_messages(keys):
+                self.sender.send(msg)
+
+    async def reply(self, msg):
+        if self.sender is not None:
+            self.sender.send(msg, urgent=True)
+        else:
+            await self.ws_conn.send(msg)
+
+    def parse_levels(self, items, price_key=0, volume_key=1):
+        if self.book_format == 'numpy':
+            return utils.levels_to_ndarray(items, price_key, volume_key)
+        return [[float(item[price_key]), float(item[volume_key])] for item in items]
+
+    def make_bbo(self, key, symbol, bid, bid_volume, ask, ask_volume, timestamp):
+        # 原生盘口 channel 的数据转成 BBO, 价格和数量都没变时返回 None, 不交给 observer
+        last = self.last_bbos.get(key)
+        if last is not None and last.bid == bid and last.ask == ask \
+                and last.bid_volume == bid_volume and last.ask_volume == ask_volume:
+            return None
+        bbo = self.last_bbos[key] = BBO(symbol, bid, bid_volume, ask, ask_volume, timestamp or int(time.time() * 1000))
+        return bbo
 
     def wipe_cache(self):
         for observer in self.observers:
@@ -51,14 +320,31 @@ class Exchange(ExchangeBoost, metaclass=ABCMeta):
         if self.is_running:
             return
         self.is_running = True
+        current_exchange.set(self)
         if hasattr(self, '_ping'):
             asyncio.create_task(self.ping())
+        attempt = 0
         while True:
+            start = time.monotonic()
             try:
                 await self._run()
             except Exception as e:
                 self.wipe_cache()
                 logger.exception(e)
+            finally:
+                self.close_pending()
+                self.close_connection()
+            if self.metrics is not None:
+                self.metrics.on_reconnect()
+            if time.monotonic() - start > self.max_reconnect_delay:
+                attempt = 0
+            await asyncio.sleep(self.get_reconnect_delay(attempt))
+            attempt += 1
+
+    def get_reconnect_delay(self, attempt):
+        # 在 [delay/2, delay] 之间随机, 避免多个连接同时重连
+        delay = min(self.max_reconnect_delay, self.reconnect_delay * 2 ** min(attempt, 32))
+        return delay / 2 + random.uniform(0, delay / 2)
 
     async def ping(self):
         while True:
@@ -70,12 +356,54 @@ class Exchange(ExchangeBoost, metaclass=ABCMeta):
             except Exception as e:
                 logger.exception(e)
 
+    def get_channel_key(self, channel):
+        return channel
+
+    def get_observers(self, key):
+        return self.channel_observers.get(key, ())
+
+    def reindex(self):
+        self.channel_observers = {}
+        self.channels = []
+        for observer in self.observers:
+            self.add_channel(observer)
+
+    def add_channel(self, observer):
+        key = self.get_channel_key(observer.channel)
+        observers = self.channel_observers.setdefault(key, [])
+        # key 为 None 时 (如 binance 加载 markets 之前) 还不能去重
+        if not observers or key is None:
+            self.channels.append(observer.channel)
+        observers.append(observer)
+
     def subscribe(self, observer):
-        if self.max_observers > 0 and len(self.observers) >= self.max_observers:
+        # 交易所限制的是每个连接的订阅数, 已订阅的 channel 再加 observer 不占名额
+        key = self.get_channel_key(observer.channel)
+        if self.max_observers > 0 and (key is None or key not in self.channel_observers) \
+                and len(self.channels) >= self.max_observers:
             raise RuntimeError(f"max observers limit {self.max_observers}")
         self.observers.append(observer)
-        self.channels.append(observer.channel)
+        self.add_channel(observer)
+        # 新的 observer 需要先拿到一次当前盘口
+        self.last_bbos.pop(key, None)
+        if self.sender is not None:
+            # 已连接时直接交给 sender, 不需要等下一条消息
+            self.send_subscribe([observer.channel])
 
     def unsubscribe(self, observer):
         self.observers.remove(observer)
-        self.channels = set([observer.channel for observer in self.observers])
+        key = self.get_channel_key(observer.channel)
+        observers = self.channel_observers.get(key)
+        if key is None or observers is None or observer not in observers:
+            # key 在订阅之后才确定, 重建索引
+            self.reindex()
+        elif len(observers) == 1:
+            del self.channel_observers[key]
+            self.channels = [item for item in self.channels if item is not observer.channel]
+        else:
+            observers.remove(observer)
+            # channels 里登记的可能正是这个 observer 的 channel, 换成剩下的
+            self.channels = [observers[0].channel if item is observer.channel else item for item in self.channels]
+        if key is not None and key not in self.channel_observers and self.sender is not None:
+            # 最后一个 observer 退出时才向服务器退订
+            self.send_unsubscribe([key])
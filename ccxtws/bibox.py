@@ -1,4 +1,3 @@
-import json
 import base64
 import gzip
 import websockets
@@ -16,45 +15,59 @@ class bibox(Exchange):
 
     async def _run(self):
         async with websockets.connect(self.ws_uri) as websocket:
-            self.ws_conn = websocket
-            added_channels = set()
+            self.open_connection(websocket)
             while True:
-                for channel in self.channels:
-                    if channel in added_channels:
-                        continue
-                    added_channels.add(channel)
-                    req = json.dumps({"event": "addChannel", "channel": f"bibox_sub_spot_{channel}_depth"})
-                    await websocket.send(req)
-                resp = await websocket.recv()
-                data = json.loads(resp)
-                if 'ping' in data:
-                    req = json.dumps({"pong": data['ping']})
-                    await websocket.send(req)
-                elif 'pong' in data:
-                    logger.warning("ping data %s", data)
-                else:
-                    self.notify(data)
+                await self.handle_message(await self.recv(websocket))
+
+    def get_subscribe_messages(self, keys):
+        return [self.codec.dumps({"event": "addChannel", "channel": f"bibox_sub_spot_{key}_depth"}) for key in keys]
+
+    def get_unsubscribe_messages(self, keys):
+        return [self.codec.dumps({"event": "removeChannel", "channel": f"bibox_sub_spot_{key}_depth"}) for key in keys]
+
+    def on_data(self, data):
+        if 'ping' in data:
+            return self.codec.dumps({"pong": data['ping']})
+        if 'pong' in data:
+            logger.warning("ping data %s", data)
+        else:
+            self.notify(data)
 
     async def _ping(self):
-        req = json.dumps({"ping": utils.get_req_id()})
+        req = self.codec.dumps({"ping": utils.get_req_id()})
         await self.ws_conn.send(req)
 
+    def get_timestamp(self, data):
+        return data.get('update_time')
+
+    @staticmethod
+    def decode_payload(payload, loads):
+        return loads(gzip.decompress(base64.b64decode(payload)))
+
+    @staticmethod
+    def expand(data, loads):
+        # executor 模式下内层的 base64+gzip 也在池里解码
+        if isinstance(data, list) and len(data) == 1 and isinstance(data[0].get('data'), str):
+            data[0]['data'] = bibox.decode_payload(data[0]['data'], loads)
+        return data
+
     def notify(self, data):
         if len(data) > 1:
             logger.warning("unknown data %s", data)
             return
-        b64_data = data[0]['data']
-        gz_data = base64.b64decode(b64_data)
-        decoded_data = gzip.decompress(gz_data)
-        j_data = json.loads(decoded_data)
+        # bibox_sub_spot_BTC_USDT_depth
+        key = data[0]['channel'][15:-6]
+        if not self.accept(key):
+            # 内层的 base64+gzip 也不用解
+            return
+        j_data = data[0]['data']
+        if isinstance(j_data, str):
+            j_data = self.decode_payload(j_data, self.codec.loads)
         final_data = {'full': True, 'asks': [], 'bids': []}
-        final_data['asks'] = [[float(item['price']), float(item['volume'])] for item in j_data['asks']]
-        final_data['bids'] = [[float(item['price']), float(item['volume'])] for item in j_data['bids']]
+        final_data['asks'] = self.parse_levels(j_data['asks'], 'price', 'volume')
+        final_data['bids'] = self.parse_levels(j_data['bids'], 'price', 'volume')
 
-        for observer in self.observers:
-            if observer.channel not in data[0]['channel']:
-                continue
-            observer.update(final_data)
+        self.dispatch(key, final_data, j_data)
 
 
 class bibox_observer(ExchangeObserver):
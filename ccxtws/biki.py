@@ -1,4 +1,3 @@
-import json
 import gzip
 import websockets
 from ccxtws.base import Exchange, ExchangeObserver, logger
@@ -13,44 +12,41 @@ class biki(Exchange):
 
     async def _run(self):
         async with websockets.connect(self.ws_uri) as websocket:
-            self.ws_conn = websocket
-            added_channels = set()
+            self.open_connection(websocket)
             while True:
-                for channel in self.channels:
-                    if channel in added_channels:
-                        continue
-                    added_channels.add(channel)
-                    req = json.dumps({"event": "sub", "params": {"channel": f"market_{channel}_depth_step0", "asks": 5, "bids": 5}})
-                    await websocket.send(req)
-                resp = await websocket.recv()
-                decoded_data = gzip.decompress(resp)
-                data = json.loads(decoded_data)
-                if 'ping' in data:
-                    req = json.dumps({"pong": data['ping']})
-                    await websocket.send(req)
-                else:
-                    self.notify(data)
-
-    def subscribe(self, observer):
-        self.observers.append(observer)
-        self.channels.add(observer.channel)
-
-    def unsubscribe(self, observer):
-        self.observers.remove(observer)
-        self.channels = set([observer.channel for observer in self.observers])
+                await self.handle_message(await self.recv(websocket))
+
+    def get_subscribe_messages(self, keys):
+        return [self.codec.dumps({"event": "sub", "params": {"channel": f"market_{key}_depth_step0", "asks": 5, "bids": 5}})
+                for key in keys]
+
+    def get_unsubscribe_messages(self, keys):
+        return [self.codec.dumps({"event": "unsub", "params": {"channel": f"market_{key}_depth_step0"}}) for key in keys]
+
+    @staticmethod
+    def decompress(resp):
+        return gzip.decompress(resp)
+
+    def on_data(self, data):
+        if 'ping' in data:
+            return self.codec.dumps({"pong": data['ping']})
+        self.notify(data)
+
+    def get_timestamp(self, data):
+        return data.get('ts')
 
     def notify(self, data):
         if 'tick' not in data:
             logger.warning("unknown data %s", data)
             return
+        # market_btcusdt_depth_step0
+        key = data['channel'].split('_')[1]
+        if not self.accept(key):
+            return
         final_data = {'full': True, 'asks': [], 'bids': []}
-        final_data['asks'] = [[float(item[0]), float(item[1])] for item in data['tick']['asks']]
-        final_data['bids'] = [[float(item[0]), float(item[1])] for item in data['tick']['buys']]
-
-        for observer in self.observers:
-            if observer.channel not in data['channel']:
-                continue
-            observer.update(final_data)
+        final_data['asks'] = self.parse_levels(data['tick']['asks'])
+        final_data['bids'] = self.parse_levels(data['tick']['buys'])
+        self.dispatch(key, final_data, data)
 
 
 class biki_observer(ExchangeObserver):
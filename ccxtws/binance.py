@@ -1,12 +1,13 @@
 import asyncio
-import json
 import time
+from collections import deque
 import websockets
 import ccxt.async_support as asyncccxt
 from ccxt.base.exchange import Exchange as BaseExchange
 from ccxt.base.precise import Precise
 from ccxtws.base import Exchange, ExchangeObserver, logger
-from . import utils
+from ccxtws.orderbook import OrderBook
+from . import markets, utils
 
 
 class binance(Exchange):
@@ -16,14 +17,41 @@ class binance(Exchange):
 
     TRADE = "{symbol}@aggTrade"
     ORDER_BOOK = "{symbol}@depth{levels}@100ms"
+    DIFF_DEPTH = "{symbol}@depth@100ms"
+    BOOK_TICKER = "{symbol}@bookTicker"
     TICKERS = "!ticker@arr"
 
     def __init__(self, ws_type='spot', cfg={}):
         super().__init__()
         # https://binance-docs.github.io/apidocs/spot/cn/#6ae7c2b506
         self.ws_uri = getattr(self, f"{ws_type}_url")
+        self.ws_type = ws_type
+        # market id -> symbol, load_markets 之后生成, 解析 trade/ticker 时直接查表
+        self.symbols_by_id = {}
+        # changed_tickers: market id -> 上一次收到的原始 ticker
+        self.last_tickers = {}
         self.max_observers = 1024
+        # 每秒最多 5 条上行消息, 留些余量; 一条 SUBSCRIBE 带多个 stream
+        self.send_rate = 4
+        self.subscribe_batch_size = 200
         self.exchange = asyncccxt.binance(cfg)
+        # diff_depth 本地深度, key 为 market id
+        self.order_books = {}
+        self.depth_buffers = {}
+        self.depth_sync_tasks = {}
+        self.unaligned_books = set()
+        self.depth_snapshot_limit = 1000
+        # 等待快照期间每个交易对最多缓存的增量数, 超出时丢弃最旧的
+        self.depth_buffer_limit = 1000
+        # 快照请求失败后的重试间隔 (秒), 按指数增长到 depth_retry_max_delay
+        self.depth_retry_delay = 1
+        self.depth_retry_max_delay = 30
+        # 重连时复用已加载的 markets, 超过 markets_ttl 秒在后台重新加载
+        self.markets_ttl = 3600
+        # markets 磁盘缓存目录, None 为 markets.CACHE_PATH
+        self.markets_path = None
+        self.markets_loaded_at = 0
+        self.markets_task = None
         # while 1:
         #     try:
         #         asyncio.get_event_loop().run_until_complete(self.exchange.load_markets())
@@ -32,56 +60,174 @@ class binance(Exchange):
         #         pass
 
     async def _run(self):
-        await self.exchange.load_markets()
+        self.reset_order_books()
+        self.last_tickers = {}
+        await self.ensure_markets()
+        self.build_symbol_map()
+        # 行情加载之后才能算出 stream, 重建索引
+        self.reindex()
         async with websockets.connect(self.ws_uri) as websocket:
-            self.ws_conn = websocket
-            req = json.dumps({"method": "SET_PROPERTY", "params": ["combined", True], "id": utils.get_req_id()})
-            await websocket.send(req)
-
-            added_channels = set()
+            self.open_connection(websocket)
             while True:
-                for channel in self.channels:
-                    stream = channel["stream"]
-                    if stream is None:
-                        params = channel["params"]
-                        feed_type = channel["feed_type"]
-                        symbol = params.get("symbol")
-                        if symbol is not None:
-                            market_id = self.exchange.markets[symbol]["lowercaseId"]
-                            params["symbol"] = market_id
-                        stream = getattr(self, f"get_{feed_type}_stream")(params)
-                        channel["stream"] = stream
-                    if stream in added_channels:
-                        continue
-                    added_channels.add(stream)
-                    req = json.dumps({"method": "SUBSCRIBE", "params": [stream], "id": utils.get_req_id()})
-                    await websocket.send(req)
-                    await asyncio.sleep(0.25)
-                resp = await websocket.recv()
-                data = json.loads(resp)
-                if 'ping' in data:
-                    req = json.dumps({"pong": data['ping']})
-                    await websocket.send(req)
-                else:
-                    self.notify(data)
+                await self.handle_message(await self.recv(websocket))
+
+    def on_open(self):
+        self.sender.send(self.codec.dumps({"method": "SET_PROPERTY", "params": ["combined", True], "id": utils.get_req_id()}))
+
+    def get_subscribe_messages(self, keys):
+        # 一条 SUBSCRIBE 最多带 subscribe_batch_size 个 stream
+        return [self.codec.dumps({"method": "SUBSCRIBE", "params": keys[i:i + self.subscribe_batch_size], "id": utils.get_req_id()})
+                for i in range(0, len(keys), self.subscribe_batch_size)]
+
+    def get_unsubscribe_messages(self, keys):
+        return [self.codec.dumps({"method": "UNSUBSCRIBE", "params": keys[i:i + self.subscribe_batch_size], "id": utils.get_req_id()})
+                for i in range(0, len(keys), self.subscribe_batch_size)]
+
+    async def ensure_markets(self):
+        if not self.exchange.markets:
+            # 优先用磁盘缓存, 进程启动时不用等 REST
+            timestamp = markets.load_cached_markets(self.exchange, self.markets_path)
+            if timestamp is None:
+                await markets.fetch_markets(self.exchange, self.markets_path)
+                timestamp = time.time() * 1000
+            self.markets_loaded_at = time.monotonic() - (time.time() - timestamp / 1000)
+        elif not self.markets_loaded_at:
+            # ShardedExchange 里共用的 ccxt 实例已由其它连接加载
+            self.markets_loaded_at = time.monotonic()
+        missing = self.get_missing_symbols()
+        if missing:
+            # 缓存里没有订阅的交易对 (如新上线), 连接之前先等 REST 重新加载
+            logger.warning("symbols %s not in cached markets, reloading", missing)
+            if await markets.refresh_markets(self.exchange, self.markets_path):
+                self.markets_loaded_at = time.monotonic()
+        if self.markets_task is None:
+            self.markets_task = asyncio.create_task(self.refresh_markets())
+
+    async def refresh_markets(self):
+        while True:
+            await asyncio.sleep(max(0, self.markets_loaded_at + self.markets_ttl - time.monotonic()))
+            # 刷新失败继续用旧的 markets
+            if await markets.refresh_markets(self.exchange, self.markets_path):
+                self.build_symbol_map()
+                # 之前找不到的交易对可能已经有了
+                self.reindex()
+                if self.sender is not None:
+                    self.send_subscribe(self.channels)
+            self.markets_loaded_at = time.monotonic()
+
+    def get_missing_symbols(self):
+        missing = set()
+        for channel in self.channels:
+            symbol = channel["params"].get("symbol")
+            if channel["stream"] is None and symbol is not None and symbol not in self.exchange.markets:
+                missing.add(symbol)
+        return missing
+
+    def on_data(self, data):
+        if 'ping' in data:
+            return self.codec.dumps({"pong": data['ping']})
+        self.notify(data)
+
+    def get_channel_key(self, channel):
+        if channel["stream"] is None and self.exchange.markets:
+            self.resolve_stream(channel)
+        return channel["stream"]
+
+    def resolve_stream(self, channel):
+        params = channel["params"]
+        feed_type = channel["feed_type"]
+        symbol = params.get("symbol")
+        if symbol is not None:
+            market = self.exchange.markets.get(symbol)
+            if market is None:
+                # 只跳过这个 channel, 不影响同一连接上的其它 stream, markets 刷新后再订阅
+                logger.warning("unknown binance symbol %s", symbol)
+                return
+            params["symbol"] = market["lowercaseId"]
+        channel["stream"] = getattr(self, f"get_{feed_type}_stream")(params)
+
+    def subscribe(self, observer):
+        super().subscribe(observer)
+        if observer.channel["feed_type"] == "changed_tickers":
+            # 新的 observer 需要先拿到一次全量
+            self.last_tickers = {}
+        elif observer.channel["feed_type"] == "bbo":
+            self.last_bbos = {}
+
+    def unsubscribe(self, observer):
+        super().unsubscribe(observer)
+        channel = observer.channel
+        if channel["feed_type"] == "diff_depth" and channel["stream"] not in self.channel_observers:
+            # 没有 observer 之后不再维护本地深度
+            self.drop_order_book(channel["params"]["symbol"].upper())
+
+    def get_timestamp(self, data):
+        # 部分深度流没有事件时间, !ticker@arr 取第一条
+        payload = data['data']
+        if isinstance(payload, list):
+            payload = payload[0] if payload else {}
+        return payload.get('E')
 
     def notify(self, data):
         if 'data' not in data:
             logger.warning("unknown data %s", data)
             return
 
-        # final_data = {'full': True, 'asks': [], 'bids': []}
-        # final_data['asks'] = [[float(item[0]), float(item[1])] for item in data['data']['asks']]
-        # final_data['bids'] = [[float(item[0]), float(item[1])] for item in data['data']['bids']]
-
-        final_data = None
-        for observer in self.observers:
+        if not self.accept(data['stream']):
+            return
+        observers = self.get_observers(data['stream'])
+        # 和 Exchange.dispatch 一样在解析之后、第一次调用 observer 之前记录, 没有回调的消息不计入
+        metrics = self.metrics
+        # tickers 和 changed_tickers 共用 !ticker@arr, 每种 feed_type 只解析一次
+        results = {}
+        profiler = self.profiler if self.profiler is not None and self.profiler.active else None
+        for observer in observers:
             channel = observer.channel
-            if channel["stream"] not in data['stream']:
+            feed_type = channel['feed_type']
+            if feed_type in results:
+                final_data = results[feed_type]
+            else:
+                final_data = results[feed_type] = getattr(self, f"parse_{feed_type}")(data, channel["params"])
+            if not final_data:
+                # diff_depth 还没和快照对齐, 或者没有变化的 ticker
                 continue
-            if final_data is None:
-                final_data = getattr(self, f"parse_{channel['feed_type']}")(data, channel["params"])
-            observer.update(final_data)
+            symbols = channel["params"].get("symbols")
+            if symbols:
+                final_data = {symbol: final_data[symbol] for symbol in symbols if symbol in final_data}
+                if not final_data:
+                    continue
+            if metrics is not None:
+                metrics.on_dispatch(data['stream'], self.get_timestamp(data))
+                metrics = None
+            if profiler is not None:
+                profiler.call_observers((observer,), final_data)
+            else:
+                observer.update(final_data)
+
+    def is_ws_market(self, market):
+        if self.ws_type == 'future_u':
+            return market.get('linear')
+        if self.ws_type == 'future_base':
+            return market.get('inverse')
+        return market.get('spot')
+
+    def build_symbol_map(self):
+        # 现货和合约的 market id 可能相同, 优先取当前 ws 类型的市场
+        symbols_by_id = {}
+        for market in self.exchange.markets.values():
+            if market['id'] not in symbols_by_id or self.is_ws_market(market):
+                symbols_by_id[market['id']] = market['symbol']
+        self.symbols_by_id = symbols_by_id
+
+    def get_symbol(self, market_id):
+        symbol = self.symbols_by_id.get(market_id)
+        if symbol is None:
+            if not self.symbols_by_id and self.exchange.markets:
+                self.build_symbol_map()
+                symbol = self.symbols_by_id.get(market_id)
+            if symbol is None:
+                symbol = self.symbols_by_id[market_id] = self.exchange.safe_symbol(market_id)
+        return symbol
 
     def parse_ticker(self, ticker, market=None):
         """
@@ -141,24 +287,218 @@ class binance(Exchange):
             # 'info': ticker,
         }
 
-    def parse_tickers(self, data, params={}):
+    def ccxt_parse_tickers(self, data, params={}):
+        # 通过 ccxt 的解析流程, 结果和 parse_tickers 相同, 用于对比
         data = data['data']
         self.exchange.parse_ticker = self.parse_ticker
         tickers = self.exchange.parse_tickers(data)
         return tickers
 
+    def fast_parse_ticker(self, ticker):
+        last = to_float(ticker.get('c'))
+        timestamp = ticker.get('C')
+        return dict(
+            symbol=self.get_symbol(ticker['s']),
+            timestamp=timestamp,
+            datetime=utils.iso8601(timestamp),
+            high=to_float(ticker.get('h')),
+            low=to_float(ticker.get('l')),
+            bid=to_float(ticker.get('b')),
+            bidVolume=to_float(ticker.get('B')),
+            ask=to_float(ticker.get('a')),
+            askVolume=to_float(ticker.get('A')),
+            vwap=to_float(ticker.get('w')),
+            open=to_float(ticker.get('o')),
+            close=last,
+            last=last,
+            previousClose=None,
+            change=to_float(ticker.get('p')),
+            percentage=to_float(ticker.get('P')),
+            average=None,
+            baseVolume=to_float(ticker.get('v')),
+            quoteVolume=to_float(ticker.get('q')),
+        )
+
+    def parse_tickers(self, data, params={}):
+        tickers = {}
+        for ticker in data['data']:
+            ticker = self.fast_parse_ticker(ticker)
+            tickers[ticker['symbol']] = ticker
+        return tickers
+
+    def parse_changed_tickers(self, data, params={}):
+        # 只返回事件时间或字段有变化的 ticker
+        tickers = {}
+        last_tickers = self.last_tickers
+        for ticker in data['data']:
+            market_id = ticker['s']
+            if last_tickers.get(market_id) == ticker:
+                continue
+            last_tickers[market_id] = ticker
+            ticker = self.fast_parse_ticker(ticker)
+            tickers[ticker['symbol']] = ticker
+        return tickers
+
     def parse_order_book(self, data, params):
         data = data['data']
+        symbol = self.get_symbol(str(params['symbol']).upper())
+        if self.book_format == 'numpy':
+            timestamp = int(time.time()*1000)
+            return {
+                'symbol': symbol,
+                'bids': self.parse_levels(data['bids']),
+                'asks': self.parse_levels(data['asks']),
+                'timestamp': timestamp,
+                'datetime': self.exchange.iso8601(timestamp),
+                'nonce': data.get('lastUpdateId'),
+            }
         self = self.exchange
         timestamp = int(time.time()*1000)
-        symbol = self.markets_by_id[str(params['symbol']).upper()]["symbol"]
         orderbook = self.parse_order_book(data, symbol, timestamp)
         orderbook['nonce'] = self.safe_integer(data, 'lastUpdateId')
         return orderbook
 
+    def parse_diff_depth(self, data, params):
+        # https://binance-docs.github.io/apidocs/spot/cn/#19cb29fa5e
+        event = data['data']
+        market_id = event['s']
+        book = self.order_books.get(market_id)
+        if book is None or not book.is_synced:
+            self.buffer_depth_event(market_id, event)
+            return None
+        applied = self.apply_depth_event(market_id, book, event)
+        if applied is None:
+            logger.warning("depth gap %s nonce %s U %s u %s", market_id, book.nonce, event['U'], event['u'])
+            book.clear()
+            self.buffer_depth_event(market_id, event)
+            return None
+        if not applied:
+            return None
+        asks, bids = applied
+        return {'full': False, 'symbol': book.symbol, 'asks': asks, 'bids': bids,
+                'timestamp': event['E'], 'nonce': book.nonce}
+
+    def buffer_depth_event(self, market_id, event):
+        buffer = self.depth_buffers.get(market_id)
+        if buffer is None:
+            buffer = self.depth_buffers[market_id] = deque(maxlen=self.depth_buffer_limit)
+        buffer.append(event)
+        # 同步 task 在重试期间一直登记着, 不会每条增量都发一次 REST
+        if market_id not in self.depth_sync_tasks:
+            self.depth_sync_tasks[market_id] = asyncio.create_task(self.sync_order_book(market_id))
+
+    def apply_depth_event(self, market_id, book, event):
+        # 返回 (asks, bids); False 表示早于快照的旧数据; None 表示序号断开需要重新同步
+        # 现货: U == 上一条 u + 1; 合约: pu == 上一条 u
+        last_update_id = book.nonce
+        if market_id in self.unaligned_books:
+            if 'pu' in event:
+                # 合约: 丢弃 u < lastUpdateId, 第一条需要 U <= lastUpdateId <= u
+                if event['u'] < last_update_id:
+                    return False
+                if event['U'] > last_update_id:
+                    return None
+            else:
+                # 现货: 丢弃 u <= lastUpdateId, 第一条需要 U <= lastUpdateId + 1 <= u
+                if event['u'] <= last_update_id:
+                    return False
+                if event['U'] > last_update_id + 1:
+                    return None
+            self.unaligned_books.discard(market_id)
+        elif 'pu' in event:
+            if event['pu'] != last_update_id:
+                return None
+        elif event['U'] != last_update_id + 1:
+            return None
+        asks = self.parse_levels(event['a'])
+        bids = self.parse_levels(event['b'])
+        book.asks.update_levels(asks)
+        book.bids.update_levels(bids)
+        book.nonce = event['u']
+        return asks, bids
+
+    async def sync_order_book(self, market_id):
+        try:
+            # 现货和合约的 market id 相同时 safe_symbol 会抛出 ArgumentsRequired, get_symbol 按 ws_type 选市场
+            symbol = self.get_symbol(market_id)
+            book = self.order_books.get(market_id)
+            if book is None:
+                book = self.order_books[market_id] = OrderBook(symbol)
+            attempt = 0
+            while True:
+                try:
+                    snapshot = await self.exchange.fetch_order_book(symbol, self.depth_snapshot_limit)
+                except Exception as e:
+                    logger.exception(e)
+                    await asyncio.sleep(min(self.depth_retry_max_delay, self.depth_retry_delay * 2 ** min(attempt, 16)))
+                    attempt += 1
+                    continue
+                book.asks.replace(snapshot['asks'])
+                book.bids.replace(snapshot['bids'])
+                book.nonce = snapshot['nonce']
+                self.unaligned_books.add(market_id)
+                events = self.depth_buffers.pop(market_id, ())
+                for event in events:
+                    if self.apply_depth_event(market_id, book, event) is None:
+                        # 快照比缓存的第一条增量还旧, 重新拉取
+                        logger.warning("depth snapshot %s nonce %s behind U %s", market_id, book.nonce, event['U'])
+                        self.depth_buffers[market_id] = deque(events, maxlen=self.depth_buffer_limit)
+                        break
+                else:
+                    break
+                await asyncio.sleep(1)
+            book.is_synced = True
+            final_data = book.to_numpy() if self.book_format == 'numpy' else book.to_dict()
+            final_data.update({'symbol': symbol, 'timestamp': int(time.time()*1000), 'nonce': book.nonce})
+            self.dispatch(self.get_diff_depth_stream({"symbol": market_id.lower()}), final_data)
+        except Exception as e:
+            logger.exception(e)
+        finally:
+            self.depth_sync_tasks.pop(market_id, None)
+
+    def drop_order_book(self, market_id):
+        task = self.depth_sync_tasks.pop(market_id, None)
+        if task is not None:
+            task.cancel()
+        self.depth_buffers.pop(market_id, None)
+        self.order_books.pop(market_id, None)
+        self.unaligned_books.discard(market_id)
+
+    def reset_order_books(self):
+        for task in self.depth_sync_tasks.values():
+            task.cancel()
+        self.depth_sync_tasks = {}
+        self.depth_buffers = {}
+        self.order_books = {}
+        self.unaligned_books = set()
+
+    def parse_bbo(self, data, params):
+        # @bookTicker 只推最优买卖价, 价格和数量都没变时不交给 observer
+        ticker = data['data']
+        # 现货的 bookTicker 没有事件时间, make_bbo 用本地时间
+        return self.make_bbo(data['stream'], self.get_symbol(ticker['s']), float(ticker['b']), float(ticker['B']),
+                             float(ticker['a']), float(ticker['A']), ticker.get('E'))
+
     def parse_trade(self, data, params):
+        # 只处理 aggTrade, 不经过 ccxt 的 safe_* 和 Precise, 字段和 ccxt_parse_trade 一致
+        trade = data["data"]
+        price = float(trade['p'])
+        amount = float(trade['q'])
+        return dict(
+            timestamp=trade['T'],
+            datetime=utils.iso8601(trade['T']),
+            symbol=self.get_symbol(trade['s']),
+            id=str(trade['a']),
+            side='sell' if trade['m'] else 'buy',
+            price=price,
+            amount=amount,
+            cost=price * amount,
+        )
+
+    def ccxt_parse_trade(self, data, params):
         trade = data["data"]
         # trade = data
+        symbol = self.get_symbol(trade['s'])
         self = self.exchange
         # market = self.market(params['symbol'])
         '''
@@ -181,7 +521,6 @@ class binance(Exchange):
         amountString = self.safe_string(trade, 'q')
         price = self.parse_number(priceString)
         amount = self.parse_number(amountString)
-        symbol = self.markets_by_id[self.safe_string(trade, 's')]["symbol"]
         costString = Precise.string_mul(priceString, amountString)
         cost = self.parse_number(costString)
         id = self.safe_string(trade, 'a')
@@ -236,10 +575,30 @@ class binance(Exchange):
             "levels": params["levels"]
         })
 
+    @staticmethod
+    def get_diff_depth_stream(params):
+        return BaseExchange.implode_params(binance.DIFF_DEPTH, {
+            "symbol": params["symbol"]
+        })
+
+    @staticmethod
+    def get_bbo_stream(params):
+        return BaseExchange.implode_params(binance.BOOK_TICKER, {
+            "symbol": params["symbol"]
+        })
+
     @staticmethod
     def get_tickers_stream(params={}):
         return binance.TICKERS
 
+    @staticmethod
+    def get_changed_tickers_stream(params={}):
+        return binance.TICKERS
+
+
+def to_float(value):
+    return None if value is None else float(value)
+
 
 class binance_observer(ExchangeObserver):
 
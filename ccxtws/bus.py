@@ -0,0 +1,205 @@
+import asyncio
+import itertools
+import os
+import socket
+import struct
+import sys
+import time
+from array import array
+from functools import partial
+from ccxtws.base import logger
+
+# 每个事件一个 unix datagram, 小端:
+#   header: version u8, kind u8, flags u8, exchange_len u8, symbol_len u16, reserved u16, seq u32, timestamp i64 (毫秒)
+#   exchange, symbol (utf-8)
+#   book:  ask_count u32, bid_count u32, asks [price f64, volume f64] * ask_count, bids 同
+#   trade: price f64, amount f64, side u8 (0 buy, 1 sell, 2 未知), id_len u8, id (utf-8)
+#   clear: 无 (连接断开, 对应 observer 收到的 {})
+VERSION = 1
+BOOK = 1
+TRADE = 2
+CLEAR = 3
+FULL = 1
+HEADER = struct.Struct('<BBBBHHIq')
+BOOK_COUNTS = struct.Struct('<II')
+TRADE_BODY = struct.Struct('<ddBB')
+SIDES = {'buy': 0, 'sell': 1}
+SIDE_NAMES = ('buy', 'sell', None)
+
+
+def flatten_levels(levels):
+    if hasattr(levels, 'tobytes'):
+        # book_format 为 numpy 时的 (n, 2) float64 ndarray
+        return levels.astype('<f8', copy=False).tobytes()
+    levels = array('d', itertools.chain.from_iterable(levels))
+    if sys.byteorder == 'big':
+        levels.byteswap()
+    return levels.tobytes()
+
+
+def encode_header(kind, flags, exchange, symbol, seq, timestamp):
+    exchange = exchange.encode()
+    symbol = symbol.encode()
+    return HEADER.pack(VERSION, kind, flags, len(exchange), len(symbol), 0, seq, timestamp) + exchange + symbol
+
+
+def encode_book(exchange, symbol, data, seq=0, timestamp=None):
+    if timestamp is None:
+        timestamp = data.get('timestamp') or int(time.time() * 1000)
+    if not data:
+        return encode_header(CLEAR, 0, exchange, symbol, seq, timestamp)
+    asks = data['asks']
+    bids = data['bids']
+    flags = FULL if data.get('full') else 0
+    return b''.join([encode_header(BOOK, flags, exchange, symbol, seq, timestamp),
+                     BOOK_COUNTS.pack(len(asks), len(bids)), flatten_levels(asks), flatten_levels(bids)])
+
+
+def encode_trade(exchange, trade, seq=0):
+    trade_id = str(trade['id']).encode() if trade.get('id') is not None else b''
+    timestamp = trade.get('timestamp') or int(time.time() * 1000)
+    return b''.join([encode_header(TRADE, 0, exchange, trade['symbol'], seq, timestamp),
+                     TRADE_BODY.pack(trade['price'], trade['amount'], SIDES.get(trade.get('side'), 2), len(trade_id)),
+                     trade_id])
+
+
+def decode(frame):
+    # 返回 dict, type 为 'book' / 'trade' / 'clear'
+    version, kind, flags, exchange_len, symbol_len, _, seq, timestamp = HEADER.unpack_from(frame)
+    if version != VERSION:
+        raise ValueError(f"unsupported bus event version {version}")
+    offset = HEADER.size
+    exchange = bytes(frame[offset:offset + exchange_len]).decode()
+    offset += exchange_len
+    symbol = bytes(frame[offset:offset + symbol_len]).decode()
+    offset += symbol_len
+    event = {'exchange': exchange, 'symbol': symbol, 'seq': seq, 'timestamp': timestamp}
+    if kind == BOOK:
+        ask_count, bid_count = BOOK_COUNTS.unpack_from(frame, offset)
+        offset += BOOK_COUNTS.size
+        levels = struct.unpack_from(f'<{(ask_count + bid_count) * 2}d', frame, offset)
+        event['type'] = 'book'
+        event['full'] = bool(flags & FULL)
+        event['asks'] = [[levels[i], levels[i + 1]] for i in range(0, ask_count * 2, 2)]
+        event['bids'] = [[levels[i], levels[i + 1]] for i in range(ask_count * 2, (ask_count + bid_count) * 2, 2)]
+    elif kind == TRADE:
+        price, amount, side, id_len = TRADE_BODY.unpack_from(frame, offset)
+        offset += TRADE_BODY.size
+        event['type'] = 'trade'
+        event['price'] = price
+        event['amount'] = amount
+        event['side'] = SIDE_NAMES[side] if side < len(SIDE_NAMES) else None
+        event['id'] = bytes(frame[offset:offset + id_len]).decode() or None
+    elif kind == CLEAR:
+        event['type'] = 'clear'
+    else:
+        raise ValueError(f"unknown bus event kind {kind}")
+    return event
+
+
+class EventPublisher:
+    # 把 observer 的数据编码后发给同机所有订阅者, 订阅者在 directory 下各自 bind 一个 unix datagram socket
+    # bus = EventPublisher('/tmp/ccxtws-bus')
+    # huobipro_observer(exchange, symbol, bus.book_callback('huobipro', symbol))
+    # binance_observer('trade', {'symbol': symbol}, bus.trade_callback('binance'))
+    # 订阅者接收缓冲区满时直接丢弃, 不会阻塞接收循环, 丢弃数见 dropped
+    def __init__(self, directory, rescan_interval=1.0):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.rescan_interval = rescan_interval
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.subscribers = []
+        self.next_scan = 0
+        self.seq = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def scan(self):
+        self.subscribers = [os.path.join(self.directory, name)
+                            for name in os.listdir(self.directory) if name.endswith('.sock')]
+        self.next_scan = time.monotonic() + self.rescan_interval
+
+    def send(self, frame):
+        if time.monotonic() >= self.next_scan:
+            self.scan()
+        closed = None
+        for path in self.subscribers:
+            try:
+                self.sock.sendto(frame, path)
+                self.sent += 1
+            except BlockingIOError:
+                self.dropped += 1
+            except (FileNotFoundError, ConnectionRefusedError):
+                # 订阅者已退出
+                closed = closed or []
+                closed.append(path)
+            except OSError as e:
+                self.dropped += 1
+                logger.warning("bus send to %s failed: %s", path, e)
+        if closed:
+            for path in closed:
+                self.subscribers.remove(path)
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def next_seq(self):
+        self.seq = (self.seq + 1) & 0xffffffff
+        return self.seq
+
+    def publish_book(self, exchange, symbol, data, timestamp=None):
+        self.send(encode_book(exchange, symbol, data, self.next_seq(), timestamp))
+
+    def publish_trade(self, exchange, trade):
+        self.send(encode_trade(exchange, trade, self.next_seq()))
+
+    def book_callback(self, exchange, symbol):
+        return partial(self.publish_book, exchange, symbol)
+
+    def trade_callback(self, exchange):
+        return partial(self.publish_trade, exchange)
+
+    def close(self):
+        self.sock.close()
+
+
+class EventSubscriber:
+    # sub = EventSubscriber('/tmp/ccxtws-bus')
+    # event = sub.recv()                 阻塞读取
+    # async for event in sub: ...        在 asyncio 里读取
+    # seq 不连续说明有事件因为缓冲区满被丢弃
+    def __init__(self, directory, bufsize=1 << 20):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{os.getpid()}-{id(self):x}.sock")
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, bufsize)
+        self.sock.bind(self.path)
+        self.buffer = bytearray(1 << 18)
+
+    def recv(self, timeout=None):
+        self.sock.settimeout(timeout)
+        size = self.sock.recv_into(self.buffer)
+        return decode(memoryview(self.buffer)[:size])
+
+    def __aiter__(self):
+        self.sock.setblocking(False)
+        return self
+
+    async def __anext__(self):
+        frame = await asyncio.get_running_loop().sock_recv(self.sock, len(self.buffer))
+        return decode(frame)
+
+    def close(self):
+        self.sock.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,69 @@
+import json
+
+
+class Codec:
+    # loads 接受 str/bytes, dumps 返回 str (websocket 文本帧)
+    def __init__(self, name, loads, dumps):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+    def __repr__(self):
+        return f"Codec({self.name})"
+
+
+def _orjson():
+    import orjson
+    return Codec('orjson', orjson.loads, lambda obj: orjson.dumps(obj).decode())
+
+
+def _msgspec():
+    import msgspec
+    decoder = msgspec.json.Decoder()
+    encoder = msgspec.json.Encoder()
+    return Codec('msgspec', decoder.decode, lambda obj: encoder.encode(obj).decode())
+
+
+def _ujson():
+    import ujson
+    return Codec('ujson', ujson.loads, ujson.dumps)
+
+
+def _json():
+    return Codec('json', json.loads, json.dumps)
+
+
+# 按解析速度排序, get_codec() 不指定名字时用第一个已安装的
+codec_factories = {
+    'orjson': _orjson,
+    'msgspec': _msgspec,
+    'ujson': _ujson,
+    'json': _json,
+}
+
+_codecs = {}
+
+
+def get_codec(name=None):
+    if name is None:
+        for item in codec_factories:
+            try:
+                return get_codec(item)
+            except ImportError:
+                continue
+    if name not in _codecs:
+        if name not in codec_factories:
+            raise ValueError(f"unknown codec {name}, available: {', '.join(codec_factories)}")
+        _codecs[name] = codec_factories[name]()
+    return _codecs[name]
+
+
+def available_codecs():
+    names = []
+    for name in codec_factories:
+        try:
+            get_codec(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
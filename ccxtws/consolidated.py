@@ -0,0 +1,218 @@
+from array import array
+from bisect import bisect_left
+from functools import partial
+
+
+class ConsolidatedSide:
+    # 多个交易所同一边的合并深度, keys 和 OrderBookSide 一样按升序存放, bids 用负价格, 最优价在前
+    # volumes 为该价格所有交易所的数量之和, venues: key -> {交易所: 数量}
+    def __init__(self, reverse=False):
+        self.reverse = reverse
+        self.keys = array('d')
+        self.volumes = array('d')
+        self.venues = {}
+        # volumes 的树状数组, depth_to 查询 O(log n); 价位增删会移动下标, 置为 None, 下次查询时 O(n) 重建
+        self.tree = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def update(self, venue, price, volume):
+        # 只改动这个交易所在这个价格上的数量, 查找 O(log n)
+        # 新价位出现/消失时 keys 和 volumes 的 insert/del 是 O(n), 和 OrderBookSide 一样是针对几千档以内的深度有意的取舍
+        key = -price if self.reverse else price
+        keys = self.keys
+        sizes = self.venues.get(key)
+        if sizes is None:
+            if not volume:
+                return
+            sizes = self.venues[key] = {}
+            i = bisect_left(keys, key)
+            keys.insert(i, key)
+            self.volumes.insert(i, 0.0)
+            self.tree = None
+        else:
+            i = bisect_left(keys, key)
+        if volume:
+            sizes[venue] = volume
+        else:
+            sizes.pop(venue, None)
+        if sizes:
+            # 交易所数量不多, 直接求和, 不累计浮点误差
+            total = sum(sizes.values())
+            tree = self.tree
+            if tree is not None:
+                delta = total - self.volumes[i]
+                j = i
+                n = len(tree)
+                while j < n:
+                    tree[j] += delta
+                    j |= j + 1
+            self.volumes[i] = total
+        else:
+            del self.venues[key]
+            del keys[i]
+            del self.volumes[i]
+            self.tree = None
+
+    def best(self):
+        # 返回 [price, 总数量, {交易所: 数量}]
+        if not self.keys:
+            return None
+        key = self.keys[0]
+        return [-key if self.reverse else key, self.volumes[0], dict(self.venues[key])]
+
+    def best_price(self):
+        if not self.keys:
+            return None
+        return -self.keys[0] if self.reverse else self.keys[0]
+
+    def venues_at(self, price):
+        # 某个价格上各交易所的数量, O(1)
+        return dict(self.venues.get(-price if self.reverse else price, ()))
+
+    def volume_at(self, price):
+        sizes = self.venues.get(-price if self.reverse else price)
+        return sum(sizes.values()) if sizes else 0.0
+
+    def build_tree(self):
+        tree = self.tree = array('d', self.volumes)
+        n = len(tree)
+        for i in range(n):
+            j = i | (i + 1)
+            if j < n:
+                tree[j] += tree[i]
+        return tree
+
+    def depth_to(self, price):
+        # 从最优价到 price (含) 的累计数量, 树状数组前缀和 O(log n)
+        # 树里的数量按差值累加, 和逐档求和可能有浮点误差; 价位增删后重建时消除
+        key = -price if self.reverse else price
+        keys = self.keys
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            i += 1
+        tree = self.tree
+        if tree is None:
+            tree = self.build_tree()
+        total = 0.0
+        while i > 0:
+            total += tree[i - 1]
+            i &= i - 1
+        return total
+
+    def levels(self, depth=None):
+        keys = self.keys
+        volumes = self.volumes
+        venues = self.venues
+        sign = -1 if self.reverse else 1
+        n = len(keys) if depth is None else min(depth, len(keys))
+        return [[sign * keys[i], volumes[i], dict(venues[keys[i]])] for i in range(n)]
+
+
+class ConsolidatedBook:
+    # 同一个交易对在多个交易所的合并深度, 每个交易所的 observer 只更新自己的价位, 不需要每次重新合并
+    # book = ConsolidatedBook('BTC/USDT')
+    # huobipro_observer(exchange, 'BTC/USDT', book.callback('huobipro'))
+    # okex_observer(exchange, 'BTC/USDT', book.callback('okex'))
+    # book.best_bid() / book.best_ask() / book.spread() / book.venues_at('asks', price)
+    # on_update 不为 None 时, 每次更新后调用 on_update(book, venue)
+    def __init__(self, symbol=None, on_update=None):
+        self.symbol = symbol
+        self.on_update = on_update
+        self.asks = ConsolidatedSide()
+        self.bids = ConsolidatedSide(reverse=True)
+        # 交易所 -> {'asks': {price: volume}, 'bids': {price: volume}}, 收到全量之前没有记录, 增量直接忽略
+        self.books = {}
+
+    def callback(self, venue):
+        return partial(self.apply, venue)
+
+    def apply(self, venue, data):
+        if not data:
+            # wipe_cache 发出的空 dict, 这个交易所的价位全部移除
+            self.remove(venue)
+        elif data.get('full'):
+            self.replace(venue, data['asks'], data['bids'])
+        elif venue in self.books:
+            book = self.books[venue]
+            self.update_levels(venue, self.asks, book['asks'], data['asks'])
+            self.update_levels(venue, self.bids, book['bids'], data['bids'])
+        else:
+            return False
+        if self.on_update is not None:
+            self.on_update(self, venue)
+        return True
+
+    @staticmethod
+    def update_levels(venue, side, levels, items):
+        if hasattr(items, 'tolist'):
+            # book_format 为 numpy 时的 ndarray
+            items = items.tolist()
+        for price, volume in items:
+            price = float(price)
+            volume = float(volume)
+            if levels.get(price, 0.0) == volume:
+                continue
+            if volume:
+                levels[price] = volume
+            else:
+                levels.pop(price, None)
+            side.update(venue, price, volume)
+
+    def replace(self, venue, asks, bids):
+        # 全量只改动和上一次不同的价位
+        book = self.books.get(venue)
+        if book is None:
+            book = self.books[venue] = {'asks': {}, 'bids': {}}
+        for name, side, items in (('asks', self.asks, asks), ('bids', self.bids, bids)):
+            if hasattr(items, 'tolist'):
+                items = items.tolist()
+            new_levels = {float(price): float(volume) for price, volume in items}
+            old_levels = book[name]
+            for price in old_levels:
+                if price not in new_levels:
+                    side.update(venue, price, 0.0)
+            for price, volume in new_levels.items():
+                if old_levels.get(price) != volume:
+                    side.update(venue, price, volume)
+            book[name] = {price: volume for price, volume in new_levels.items() if volume}
+
+    def remove(self, venue):
+        book = self.books.pop(venue, None)
+        if book is None:
+            return
+        for price in book['asks']:
+            self.asks.update(venue, price, 0.0)
+        for price in book['bids']:
+            self.bids.update(venue, price, 0.0)
+
+    def best_ask(self):
+        return self.asks.best()
+
+    def best_bid(self):
+        return self.bids.best()
+
+    def spread(self):
+        # 跨交易所的最优卖价 - 最优买价, 小于 0 说明不同交易所之间价格交叉
+        ask = self.asks.best_price()
+        bid = self.bids.best_price()
+        if ask is None or bid is None:
+            return None
+        return ask - bid
+
+    def is_crossed(self):
+        spread = self.spread()
+        return spread is not None and spread < 0
+
+    def venues_at(self, side, price):
+        return getattr(self, side).venues_at(price)
+
+    def volume_at(self, side, price):
+        return getattr(self, side).volume_at(price)
+
+    def depth_to(self, side, price):
+        return getattr(self, side).depth_to(price)
+
+    def to_dict(self, depth=None):
+        return {'full': True, 'asks': self.asks.levels(depth), 'bids': self.bids.levels(depth)}
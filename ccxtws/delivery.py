@@ -0,0 +1,103 @@
+import asyncio
+import inspect
+from collections import deque
+from ccxtws.base import logger, current_exchange
+
+BLOCK = 'block'
+DROP_OLDEST = 'drop_oldest'
+CONFLATE = 'conflate'
+POLICIES = (BLOCK, DROP_OLDEST, CONFLATE)
+
+
+class queued_callback:
+    # observer 的 update 只把数据放进队列, 用户回调在独立 task 里执行, 慢回调不会卡住 websocket.recv
+    # huobipro_observer(exchange, symbol, queued_callback(callback, maxsize=100, policy='conflate'))
+    # 不传 callback 时作为异步迭代器使用:
+    #   queue = queued_callback(policy='conflate')
+    #   ws.subscribe(huobipro_observer(exchange, symbol, queue))
+    #   async for data in queue: ...
+    # policy:
+    #   block       队列满时不丢数据, 给它喂数据的连接在下一次 recv 前等待消费者, 其它连接照常读取
+    #               不在 Exchange.run / replay 里调用时没有可以暂停的连接, 按 drop_oldest 处理
+    #   drop_oldest 队列满时丢弃最旧的一条
+    #   conflate    收到全量 (full=True) 或清空 ({}) 时丢弃队列里所有旧数据, 只保留最新的;
+    #               增量数据不能合并, 队列满时按 drop_oldest 处理
+    # callback 可以是普通函数或 async 函数
+    def __init__(self, callback=None, maxsize=1000, policy=DROP_OLDEST):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy {policy}, expected one of {POLICIES}")
+        self.callback = callback
+        self.maxsize = maxsize
+        self.policy = policy
+        self.queue = deque()
+        self.event = None
+        self.task = None
+        # block 时被暂停的 Exchange
+        self.blocked = set()
+        self.dropped = 0
+        self.delivered = 0
+
+    def __call__(self, data):
+        queue = self.queue
+        if self.policy == CONFLATE:
+            if not data or (isinstance(data, dict) and data.get('full')):
+                self.dropped += len(queue)
+                queue.clear()
+            elif queue and queue[-1] is data:
+                # book_callback 等每次交给的是同一个对象
+                return
+        queue.append(data)
+        if len(queue) > self.maxsize > 0:
+            exchange = current_exchange.get() if self.policy == BLOCK else None
+            if exchange is not None:
+                exchange.backpressure.block(self)
+                self.blocked.add(exchange)
+            else:
+                queue.popleft()
+                self.dropped += 1
+        if self.event is not None:
+            self.event.set()
+        if self.callback is not None and (self.task is None or self.task.done()):
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def get(self):
+        while not self.queue:
+            # 在当前事件循环里新建, 多次 asyncio.run 也能使用
+            self.event = asyncio.Event()
+            await self.event.wait()
+        self.event = None
+        data = self.queue.popleft()
+        if self.blocked and len(self.queue) <= self.maxsize:
+            self.release()
+        self.delivered += 1
+        return data
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+    async def run(self):
+        while True:
+            data = await self.get()
+            try:
+                result = self.callback(data)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.exception(e)
+
+    def release(self):
+        for exchange in self.blocked:
+            exchange.backpressure.release(self)
+        self.blocked = set()
+
+    def qsize(self):
+        return len(self.queue)
+
+    def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.release()
@@ -1,4 +1,3 @@
-import json
 import websockets
 from ccxtws.base import Exchange, ExchangeObserver, logger
 from . import utils
@@ -14,37 +13,40 @@ class gateio(Exchange):
 
     async def _run(self):
         async with websockets.connect(self.ws_uri, ping_interval=None) as websocket:
-            self.ws_conn = websocket
-            is_added = False
+            self.open_connection(websocket)
             while True:
-                if not is_added:
-                    params = [[item, 5, '0']for item in self.channels]
-                    req = json.dumps({"id": utils.get_req_id(), "method": "depth.subscribe", "params": params})
-                    await websocket.send(req)
-                    is_added = True
-                resp = await websocket.recv()
-                data = json.loads(resp)
-                if 'method' in data and data['method'] == 'depth.update':
-                    self.notify(data)
-                else:
-                    logger.warning("unknown data %s", data)
+                await self.handle_message(await self.recv(websocket))
+
+    def get_subscribe_messages(self, keys):
+        # depth.subscribe 会替换之前的订阅, 每次都带上全部 channel
+        params = [[item, 5, '0'] for item in self.subscribed]
+        return [self.codec.dumps({"id": utils.get_req_id(), "method": "depth.subscribe", "params": params})]
+
+    def get_unsubscribe_messages(self, keys):
+        # 用剩下的 channel 重新订阅即可, 全部退订时才发 depth.unsubscribe
+        if self.subscribed:
+            return self.get_subscribe_messages([])
+        return [self.codec.dumps({"id": utils.get_req_id(), "method": "depth.unsubscribe", "params": []})]
+
+    def on_data(self, data):
+        if 'method' in data and data['method'] == 'depth.update':
+            self.notify(data)
+        else:
+            logger.warning("unknown data %s", data)
 
     async def _ping(self):
-        req = json.dumps({"id": utils.get_req_id(), "method": "server.ping", "params": []})
+        req = self.codec.dumps({"id": utils.get_req_id(), "method": "server.ping", "params": []})
         await self.ws_conn.send(req)
 
     def notify(self, data):
-        final_data = {'asks': [], 'bids': []}
-        final_data['full'] = data['params'][0]
-        if 'asks' in data['params'][1]:
-            final_data['asks'] = [[float(item[0]), float(item[1])] for item in data['params'][1]['asks']]
-        if 'bids' in data['params'][1]:
-            final_data['bids'] = [[float(item[0]), float(item[1])] for item in data['params'][1]['bids']]
-
-        for observer in self.observers:
-            if observer.channel != data['params'][2]:
-                continue
-            observer.update(final_data)
+        key = data['params'][2]
+        if not self.accept(key):
+            return
+        final_data = {'full': data['params'][0]}
+        final_data['asks'] = self.parse_levels(data['params'][1].get('asks', []))
+        final_data['bids'] = self.parse_levels(data['params'][1].get('bids', []))
+
+        self.dispatch(key, final_data, data)
 
 
 class gateio_observer(ExchangeObserver):
@@ -1,4 +1,3 @@
-import json
 import websockets
 from ccxtws.base import Exchange, ExchangeObserver, logger
 from . import utils
@@ -13,34 +12,35 @@ class hitbtc(Exchange):
 
     async def _run(self):
         async with websockets.connect(self.ws_uri) as websocket:
-            self.ws_conn = websocket
-            added_channels = set()
+            self.open_connection(websocket)
             while True:
-                for channel in self.channels:
-                    if channel in added_channels:
-                        continue
-                    added_channels.add(channel)
-                    req = json.dumps({"id": utils.get_req_id(), "method": "subscribeOrderbook", "params": {"symbol": channel}})
-                    await websocket.send(req)
-                resp = await websocket.recv()
-                data = json.loads(resp)
-                if 'method' in data and data['method'] in ['snapshotOrderbook', 'updateOrderbook']:
-                    self.notify(data)
-                else:
-                    logger.warning("unknown data %s", data)
+                await self.handle_message(await self.recv(websocket))
+
+    def get_subscribe_messages(self, keys):
+        return [self.codec.dumps({"id": utils.get_req_id(), "method": "subscribeOrderbook", "params": {"symbol": key}})
+                for key in keys]
+
+    def get_unsubscribe_messages(self, keys):
+        return [self.codec.dumps({"id": utils.get_req_id(), "method": "unsubscribeOrderbook", "params": {"symbol": key}})
+                for key in keys]
+
+    def on_data(self, data):
+        if 'method' in data and data['method'] in ['snapshotOrderbook', 'updateOrderbook']:
+            self.notify(data)
+        else:
+            logger.warning("unknown data %s", data)
+
+    def get_timestamp(self, data):
+        return utils.iso8601_to_ms(data['params'].get('timestamp'))
 
     def notify(self, data):
-        final_data = {'asks': [], 'bids': []}
-        final_data['full'] = data['method'] == 'snapshotOrderbook'
-        if 'ask' in data['params']:
-            final_data['asks'] = [[float(item['price']), float(item['size'])] for item in data['params']['ask']]
-        if 'bid' in data['params']:
-            final_data['bids'] = [[float(item['price']), float(item['size'])] for item in data['params']['bid']]
-
-        for observer in self.observers:
-            if observer.channel != data['params']['symbol']:
-                continue
-            observer.update(final_data)
+        if not self.accept(data['params']['symbol']):
+            return
+        final_data = {'full': data['method'] == 'snapshotOrderbook'}
+        final_data['asks'] = self.parse_levels(data['params'].get('ask', []), 'price', 'size')
+        final_data['bids'] = self.parse_levels(data['params'].get('bid', []), 'price', 'size')
+
+        self.dispatch(data['params']['symbol'], final_data, data)
 
 
 class hitbtc_observer(ExchangeObserver):
@@ -1,4 +1,3 @@
-import json
 import gzip
 import websockets
 from ccxtws.base import Exchange, ExchangeObserver, logger
@@ -14,42 +13,71 @@ class huobipro(Exchange):
 
     async def _run(self):
         async with websockets.connect(self.ws_uri) as websocket:
-            self.ws_conn = websocket
-            added_channels = set()
+            self.open_connection(websocket)
             while True:
-                for channel in self.channels:
-                    if channel in added_channels:
-                        continue
-                    added_channels.add(channel)
-                    req = json.dumps({"sub": f"market.{channel}.mbp.refresh.5", "id": utils.get_req_id()})
-                    await websocket.send(req)
-                resp = await websocket.recv()
-                decoded_data = gzip.decompress(resp)
-                data = json.loads(decoded_data)
-                if 'ping' in data:
-                    req = json.dumps({"pong": data['ping']})
-                    await websocket.send(req)
-                else:
-                    self.notify(data)
+                await self.handle_message(await self.recv(websocket))
+
+    @staticmethod
+    def get_topic(key):
+        # 深度的 key 为 market id, 盘口的 key 为 'bbo:' + market id
+        if key.startswith('bbo:'):
+            return f"market.{key[4:]}.bbo"
+        return f"market.{key}.mbp.refresh.5"
+
+    def get_subscribe_messages(self, keys):
+        return [self.codec.dumps({"sub": self.get_topic(key), "id": utils.get_req_id()}) for key in keys]
+
+    def get_unsubscribe_messages(self, keys):
+        return [self.codec.dumps({"unsub": self.get_topic(key), "id": utils.get_req_id()}) for key in keys]
+
+    @staticmethod
+    def decompress(resp):
+        return gzip.decompress(resp)
+
+    def on_data(self, data):
+        if 'ping' in data:
+            return self.codec.dumps({"pong": data['ping']})
+        self.notify(data)
+
+    def get_timestamp(self, data):
+        return data.get('ts')
 
     def notify(self, data):
         if 'tick' not in data:
             logger.warning("unknown data %s", data)
             return
+        # market.btcusdt.mbp.refresh.5 / market.btcusdt.bbo
+        _, market_id, topic = data['ch'].split('.', 2)
+        if topic == 'bbo':
+            key = 'bbo:' + market_id
+            if not self.accept(key):
+                return
+            tick = data['tick']
+            bbo = self.make_bbo(key, self.get_observers(key)[0].symbol, float(tick['bid']), float(tick['bidSize']),
+                                float(tick['ask']), float(tick['askSize']), tick.get('quoteTime'))
+            if bbo is not None:
+                self.dispatch(key, bbo, data)
+            return
+        key = market_id
+        if not self.accept(key):
+            return
         final_data = {'full': True, 'asks': [], 'bids': []}
-        final_data['asks'] = [[float(item[0]), float(item[1])] for item in data['tick']['asks']]
-        final_data['bids'] = [[float(item[0]), float(item[1])] for item in data['tick']['bids']]
-
-        for observer in self.observers:
-            if observer.channel not in data['ch']:
-                continue
-            observer.update(final_data)
+        final_data['asks'] = self.parse_levels(data['tick']['asks'])
+        final_data['bids'] = self.parse_levels(data['tick']['bids'])
+        self.dispatch(key, final_data, data)
 
 
 class huobipro_observer(ExchangeObserver):
-    def __init__(self, exchange, symbol, callback):
+    # feed_type='bbo' 订阅 market.$symbol.bbo, 只在最优买卖价或数量变化时收到 BBO
+    def __init__(self, exchange, symbol, callback, feed_type='depth'):
         market = exchange.market(symbol)
-        self.channel = market['id']
+        self.symbol = market['symbol']
+        if feed_type == 'depth':
+            self.channel = market['id']
+        elif feed_type == 'bbo':
+            self.channel = 'bbo:' + market['id']
+        else:
+            raise ValueError(f"unknown feed type {feed_type}, expected depth or bbo")
         self.callback = callback
 
     def update(self, data):
@@ -1,5 +1,4 @@
-import json
-import asyncio
+import time
 import websockets
 from ccxtws.base import Exchange, ExchangeObserver, logger
 from . import utils
@@ -11,60 +10,104 @@ class kucoin(Exchange):
         # https://docs.kucoin.com/cn/#88387098a2
         self.ping_sleep_time = 60
         self.max_observers = 100
+        # bullet token 有效期 24 小时, 重连时在 bullet_ttl 内复用, 连接失败时丢弃
+        self.bullet = None
+        self.bullet_time = 0
+        self.bullet_ttl = 3600
 
     async def _run(self):
-        exchange = self.observers[0].exchange
-        resp = await exchange.publicPostBulletPublic()
+        resp = await self.get_bullet()
         endpoint = resp['data']['instanceServers'][0]['endpoint']
         self.ping_sleep_time = float(resp['data']['instanceServers'][0]['pingInterval']) / 1000
         token = resp['data']['token']
         ws_uri = f'{endpoint}?token={token}'
-        async with websockets.connect(ws_uri) as websocket:
-            self.ws_conn = websocket
-            is_available = False
-            is_added = False
-            while True:
-                if not is_available:
-                    resp = await websocket.recv()
-                    data = json.loads(resp)
+        is_available = False
+        try:
+            async with websockets.connect(ws_uri) as websocket:
+                while not is_available:
+                    data = self.codec.loads(await self.recv(websocket))
                     if data['type'] == 'welcome':
                         is_available = True
                     else:
-                        asyncio.sleep(1)
-                        continue
-                if not is_added:
-                    params = {"id": utils.get_req_id(), "type": "subscribe",
-                              "topic": f"/spotMarket/level2Depth5:{','.join(self.channels)}", "privateChannel": False, "response": True}
-                    req = json.dumps(params)
-                    await websocket.send(req)
-                    is_added = True
-                resp = await websocket.recv()
-                data = json.loads(resp)
-                if 'subject' in data and data['subject'] == 'level2':
-                    self.notify(data)
-                else:
-                    logger.warning("unknown data %s", data)
+                        logger.warning("unknown data %s", data)
+                self.open_connection(websocket)
+                while True:
+                    await self.handle_message(await self.recv(websocket))
+        except Exception:
+            if not is_available:
+                # 没收到 welcome, token 可能已失效, 下次重连重新获取
+                self.bullet = None
+            raise
+
+    @staticmethod
+    def group_topics(keys):
+        # 深度的 key 为 market id, 盘口的 key 为 'bbo:' + market id, 同一个 topic 的交易对合并成一条消息
+        depth = [key for key in keys if not key.startswith('bbo:')]
+        bbo = [key[4:] for key in keys if key.startswith('bbo:')]
+        return [(topic, ids) for topic, ids in (('/spotMarket/level2Depth5', depth), ('/spotMarket/level1', bbo)) if ids]
+
+    def get_subscribe_messages(self, keys):
+        return [self.codec.dumps({"id": utils.get_req_id(), "type": "subscribe", "topic": f"{topic}:{','.join(ids)}",
+                                  "privateChannel": False, "response": True}) for topic, ids in self.group_topics(keys)]
+
+    def get_unsubscribe_messages(self, keys):
+        return [self.codec.dumps({"id": utils.get_req_id(), "type": "unsubscribe", "topic": f"{topic}:{','.join(ids)}",
+                                  "privateChannel": False, "response": True}) for topic, ids in self.group_topics(keys)]
+
+    async def get_bullet(self):
+        if self.bullet is None or time.monotonic() - self.bullet_time > self.bullet_ttl:
+            exchange = self.observers[0].exchange
+            self.bullet = await exchange.publicPostBulletPublic()
+            self.bullet_time = time.monotonic()
+        return self.bullet
+
+    def on_data(self, data):
+        if 'subject' in data and data['subject'] in ('level2', 'level1'):
+            self.notify(data)
+        else:
+            logger.warning("unknown data %s", data)
 
     async def _ping(self):
-        req = json.dumps({"type": "ping", "id": utils.get_req_id()})
+        req = self.codec.dumps({"type": "ping", "id": utils.get_req_id()})
         await self.ws_conn.send(req)
 
+    def get_timestamp(self, data):
+        return data['data'].get('timestamp')
+
     def notify(self, data):
+        # /spotMarket/level2Depth5:BTC-USDT / /spotMarket/level1:BTC-USDT
+        key = data['topic'].split(':')[1]
+        if data['subject'] == 'level1':
+            key = 'bbo:' + key
+            if not self.accept(key):
+                return
+            bid, bid_volume = data['data']['bids']
+            ask, ask_volume = data['data']['asks']
+            bbo = self.make_bbo(key, self.get_observers(key)[0].symbol, float(bid), float(bid_volume),
+                                float(ask), float(ask_volume), data['data'].get('timestamp'))
+            if bbo is not None:
+                self.dispatch(key, bbo, data)
+            return
+        if not self.accept(key):
+            return
         final_data = {'full': True, 'asks': [], 'bids': []}
-        final_data['asks'] = [[float(item[0]), float(item[1])] for item in data['data']['asks']]
-        final_data['bids'] = [[float(item[0]), float(item[1])] for item in data['data']['bids']]
-
-        for observer in self.observers:
-            if observer.channel not in data['topic']:
-                continue
-            observer.update(final_data)
+        final_data['asks'] = self.parse_levels(data['data']['asks'])
+        final_data['bids'] = self.parse_levels(data['data']['bids'])
+        self.dispatch(key, final_data, data)
 
 
 class kucoin_observer(ExchangeObserver):
-    def __init__(self, exchange, symbol, callback):
+    # feed_type='bbo' 订阅 /spotMarket/level1, 只在最优买卖价或数量变化时收到 BBO
+    def __init__(self, exchange, symbol, callback, feed_type='depth'):
         self.exchange = exchange
         market = exchange.market(symbol)
-        self.channel = market['id'].upper()
+        self.symbol = market['symbol']
+        if feed_type == 'depth':
+            self.channel = market['id'].upper()
+        elif feed_type == 'bbo':
+            self.channel = 'bbo:' + market['id'].upper()
+        else:
+            raise ValueError(f"unknown feed type {feed_type}, expected depth or bbo")
         self.callback = callback
 
     def update(self, data):
@@ -0,0 +1,83 @@
+import asyncio
+import inspect
+import os
+import time
+from ccxtws.base import logger
+from .codec import get_codec
+
+# 缓存格式变化时加 1, 旧版本的文件会被忽略
+CACHE_VERSION = 1
+# 缓存目录, 和日志一样默认放在 /tmp 下
+CACHE_PATH = os.environ.get('CCXTWS_CACHE_PATH', '/tmp/ccxtws')
+
+
+def cache_file(exchange, path=None):
+    return os.path.join(path or CACHE_PATH, f"{exchange.id}.markets.json")
+
+
+def read_cache(exchange, path=None):
+    # 返回 (timestamp_ms, markets), 没有可用缓存时返回 (None, None)
+    try:
+        with open(cache_file(exchange, path), 'rb') as f:
+            cache = get_codec().loads(f.read())
+    except FileNotFoundError:
+        return None, None
+    except Exception as e:
+        logger.warning("invalid markets cache %s: %s", cache_file(exchange, path), e)
+        return None, None
+    if cache.get('version') != CACHE_VERSION or cache.get('exchange') != exchange.id:
+        return None, None
+    return cache['timestamp'], cache['markets']
+
+
+def save_markets(exchange, path=None):
+    file = cache_file(exchange, path)
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    cache = {'version': CACHE_VERSION, 'exchange': exchange.id, 'timestamp': int(time.time() * 1000),
+             'markets': list(exchange.markets.values())}
+    # 先写临时文件再替换, 其它进程不会读到写了一半的文件
+    tmp = f"{file}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(get_codec().dumps(cache))
+    os.replace(tmp, file)
+
+
+def load_cached_markets(exchange, path=None):
+    # 同步加载, 不需要事件循环, 适合在创建 observer 之前调用
+    # 返回缓存的时间戳 (毫秒), 没有缓存时返回 None
+    timestamp, markets = read_cache(exchange, path)
+    if markets is not None:
+        exchange.set_markets(markets)
+    return timestamp
+
+
+async def fetch_markets(exchange, path=None):
+    # ccxt 同步版的 load_markets 放到线程池里执行, 不阻塞事件循环
+    if inspect.iscoroutinefunction(exchange.load_markets):
+        await exchange.load_markets(reload=True)
+    else:
+        await asyncio.get_running_loop().run_in_executor(None, lambda: exchange.load_markets(reload=True))
+    save_markets(exchange, path)
+
+
+async def refresh_markets(exchange, path=None):
+    # 后台刷新, 失败时继续使用已有的 markets
+    try:
+        await fetch_markets(exchange, path)
+        return True
+    except Exception as e:
+        logger.exception(e)
+        return False
+
+
+async def load_markets(exchange, path=None, max_age=86400, refresh=True):
+    # 优先用磁盘缓存, 缓存超过 max_age 秒时在后台刷新; 没有缓存时才同步请求 REST
+    # REST 失败时即使缓存已过期也继续使用, 离线环境可以直接用保存的文件
+    # 返回后台刷新的 task, 不需要刷新时返回 None
+    # exchange = ccxt.huobipro(); await ccxtws.markets.load_markets(exchange)
+    timestamp = load_cached_markets(exchange, path)
+    if timestamp is None:
+        await fetch_markets(exchange, path)
+    elif refresh and time.time() * 1000 - timestamp > max_age * 1000:
+        return asyncio.get_running_loop().create_task(refresh_markets(exchange, path))
+    return None
@@ -0,0 +1,219 @@
+import asyncio
+import bisect
+import time
+from ccxtws.base import logger
+
+# 延迟分桶 (秒), 交易所时钟偏差可能导致负值, 落在第一个桶
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 断线到新连接收到第一帧的时间 (秒)
+RECONNECT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        # 最后一个是 +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        # 按桶上界估算, 超出最大桶时返回 None
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return None
+
+    def snapshot(self):
+        return {'count': self.count, 'sum': self.sum, 'p50': self.quantile(0.5), 'p99': self.quantile(0.99)}
+
+
+class ChannelMetrics:
+    def __init__(self):
+        self.messages = 0
+        self.last_time = 0.0
+        # 交易所消息时间戳 -> 本地收到
+        self.exchange_latency = Histogram()
+        # 本地收到 -> 调用 observer
+        self.callback_latency = Histogram()
+
+
+class ExchangeMetrics:
+    # 按交易所统计, 在 recv/handle_message/dispatch/run 里更新, 见 base.Exchange
+    def __init__(self, name, clock_offset=0.0):
+        self.name = name
+        # 交易所时钟 - 本地时钟 (秒), 用 estimate_clock_offset 估算, 不同交易所的延迟才可比
+        self.clock_offset = clock_offset
+        self.messages = 0
+        self.bytes = 0
+        self.reconnects = 0
+        self.parse_errors = 0
+        # 没有 observer 被丢弃的消息
+        self.dropped = 0
+        self.recv_time = 0.0
+        self.channels = {}
+        self.disconnected_at = 0.0
+        self.reconnect_time = Histogram(RECONNECT_BUCKETS)
+
+    def on_recv(self, resp):
+        self.recv_time = time.time()
+        self.messages += 1
+        self.bytes += len(resp)
+        if self.disconnected_at:
+            self.reconnect_time.observe(self.recv_time - self.disconnected_at)
+            self.disconnected_at = 0.0
+
+    def on_dispatch(self, key, timestamp=None):
+        now = time.time()
+        channel = self.channels.get(key)
+        if channel is None:
+            channel = self.channels[key] = ChannelMetrics()
+        channel.messages += 1
+        channel.last_time = now
+        channel.callback_latency.observe(now - self.recv_time)
+        if timestamp is not None:
+            channel.exchange_latency.observe(self.recv_time - timestamp / 1000 + self.clock_offset)
+
+    def on_drop(self):
+        self.dropped += 1
+
+    def on_parse_error(self):
+        self.parse_errors += 1
+
+    def on_reconnect(self):
+        self.reconnects += 1
+        if not self.disconnected_at:
+            self.disconnected_at = time.time()
+
+    def snapshot(self):
+        now = time.time()
+        return {
+            'messages': self.messages,
+            'bytes': self.bytes,
+            'reconnects': self.reconnects,
+            'parse_errors': self.parse_errors,
+            'dropped': self.dropped,
+            'clock_offset': self.clock_offset,
+            'reconnect_time': self.reconnect_time.snapshot(),
+            'channels': {str(key): {
+                'messages': channel.messages,
+                'age': now - channel.last_time,
+                'exchange_latency': channel.exchange_latency.snapshot(),
+                'callback_latency': channel.callback_latency.snapshot(),
+            } for key, channel in self.channels.items()},
+        }
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry:
+    # registry = MetricsRegistry()
+    # registry.track(ws, 'huobipro')
+    # registry.snapshot() / registry.to_prometheus() / await registry.serve(port=9108)
+    def __init__(self):
+        self.exchanges = {}
+
+    def get(self, name, clock_offset=0.0):
+        metrics = self.exchanges.get(name)
+        if metrics is None:
+            metrics = self.exchanges[name] = ExchangeMetrics(name, clock_offset)
+        return metrics
+
+    def track(self, exchange, name=None, clock_offset=0.0):
+        if name is None:
+            name = type(exchange).__name__
+        metrics = exchange.metrics = self.get(name, clock_offset)
+        return metrics
+
+    def snapshot(self):
+        return {name: metrics.snapshot() for name, metrics in self.exchanges.items()}
+
+    def to_prometheus(self):
+        lines = []
+        now = time.time()
+        for field, kind in [('messages', 'counter'), ('bytes', 'counter'), ('reconnects', 'counter'),
+                            ('parse_errors', 'counter'), ('dropped', 'counter'), ('clock_offset', 'gauge')]:
+            name = f"ccxtws_{field}_total" if kind == 'counter' else f"ccxtws_{field}_seconds"
+            lines.append(f"# TYPE {name} {kind}")
+            for exchange, metrics in self.exchanges.items():
+                lines.append(f'{name}{{exchange="{escape_label(exchange)}"}} {getattr(metrics, field)}')
+        lines.append("# TYPE ccxtws_reconnect_time_seconds histogram")
+        for exchange, metrics in self.exchanges.items():
+            lines.extend(self.histogram_lines('ccxtws_reconnect_time_seconds', f'exchange="{escape_label(exchange)}"',
+                                              metrics.reconnect_time))
+        lines.append("# TYPE ccxtws_channel_messages_total counter")
+        lines.append("# TYPE ccxtws_channel_age_seconds gauge")
+        for exchange, metrics in self.exchanges.items():
+            for key, channel in metrics.channels.items():
+                labels = f'exchange="{escape_label(exchange)}",channel="{escape_label(key)}"'
+                lines.append(f"ccxtws_channel_messages_total{{{labels}}} {channel.messages}")
+                lines.append(f"ccxtws_channel_age_seconds{{{labels}}} {now - channel.last_time}")
+        for field in ['exchange_latency', 'callback_latency']:
+            name = f"ccxtws_{field}_seconds"
+            lines.append(f"# TYPE {name} histogram")
+            for exchange, metrics in self.exchanges.items():
+                for key, channel in metrics.channels.items():
+                    labels = f'exchange="{escape_label(exchange)}",channel="{escape_label(key)}"'
+                    lines.extend(self.histogram_lines(name, labels, getattr(channel, field)))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def histogram_lines(name, labels, histogram):
+        lines = []
+        total = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            total += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {total}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return lines
+
+    async def handle_http(self, reader, writer):
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+            path = request.split(b' ', 2)[1] if request.count(b' ') >= 2 else b''
+            if path == b'/metrics':
+                status, body = '200 OK', self.to_prometheus().encode()
+            else:
+                status, body = '404 Not Found', b'not found\n'
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except Exception as e:
+            logger.exception(e)
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=9108):
+        # Prometheus 拉取地址 http://host:port/metrics
+        return await asyncio.start_server(self.handle_http, host, port)
+
+
+# 默认的全局 registry
+registry = MetricsRegistry()
+
+
+async def estimate_clock_offset(exchange, samples=5):
+    # 用 ccxt 的 fetch_time 估算交易所时钟 - 本地时钟 (秒), 取往返最短的一次
+    best = None
+    for _ in range(samples):
+        start = time.time()
+        server_time = await exchange.fetch_time()
+        end = time.time()
+        if best is None or end - start < best[0]:
+            best = (end - start, server_time / 1000 - (start + end) / 2)
+    return best[1]
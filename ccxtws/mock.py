@@ -0,0 +1,617 @@
+import asyncio
+import base64
+import gzip
+import json
+import random
+import time
+import zlib
+from abc import ABCMeta, abstractmethod
+import websockets
+from ccxtws.base import logger
+
+# 本地模拟各交易所的 websocket 协议 (按 ccxtws 各 adapter 实际使用的部分), 用于离线压测
+#
+#   server = mock.servers['huobipro'](rate=100)
+#   await server.start()
+#   ws = ccxtws.huobipro()
+#   ws.ws_uri = server.ws_uri
+#   exchange = ccxt.huobipro()
+#   exchange.set_markets(mock.make_markets('huobipro', 10))
+#   ws.subscribe(ccxtws.huobipro_observer(exchange, 'COIN0/USDT', callback))
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+def iso8601(timestamp):
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(timestamp // 1000)) + f'.{timestamp % 1000:03d}Z'
+
+
+def make_markets(venue, count, quote='USDT'):
+    # 生成 ccxt set_markets 可用的行情, id 格式和各交易所一致
+    markets = []
+    for i in range(count):
+        base = f'COIN{i}'
+        market_id = {
+            'binance': f'{base}{quote}',
+            'huobipro': f'{base}{quote}'.lower(),
+            'biki': f'{base}{quote}'.lower(),
+            'okex': f'{base}-{quote}',
+            'kucoin': f'{base}-{quote}',
+            'gateio': f'{base}_{quote}'.lower(),
+            'coinex': f'{base}{quote}',
+            'hitbtc': f'{base}{quote}',
+            'poloniex': f'{quote}_{base}',
+            'bibox': f'{base}_{quote}',
+            'mxc': f'{base}_{quote}',
+            'ascendex': f'{base}/{quote}',
+        }[venue]
+        markets.append({
+            'id': market_id, 'lowercaseId': market_id.lower(), 'symbol': f'{base}/{quote}',
+            'base': base, 'quote': quote, 'baseId': base, 'quoteId': quote,
+            'type': 'spot', 'spot': True, 'active': True,
+            'info': {'id': 1000 + i, 'symbol': market_id},
+        })
+    return markets
+
+
+class MockBook:
+    # 随机游走的深度, 提供全量快照和增量
+    def __init__(self, rng, levels=5, tick=0.01):
+        self.rng = rng
+        self.levels = levels
+        self.tick = tick
+        self.mid = rng.uniform(1, 1000)
+        self.seq = rng.randint(1000, 100000)
+        self.asks = {}
+        self.bids = {}
+        self.reset()
+
+    def price(self, value):
+        return f'{value:.2f}'
+
+    def reset(self):
+        self.asks = {self.price(self.mid + self.tick * (i + 1)): self.size() for i in range(self.levels)}
+        self.bids = {self.price(self.mid - self.tick * (i + 1)): self.size() for i in range(self.levels)}
+
+    def size(self):
+        return f'{self.rng.uniform(0.001, 10):.6f}'
+
+    def snapshot(self):
+        self.seq += 1
+        if self.rng.random() < 0.2:
+            self.mid += self.rng.choice((-self.tick, self.tick))
+            self.reset()
+        return self.current()
+
+    def current(self):
+        asks = sorted(self.asks.items(), key=lambda item: float(item[0]))
+        bids = sorted(self.bids.items(), key=lambda item: -float(item[0]))
+        return [list(item) for item in asks], [list(item) for item in bids]
+
+    def delta(self):
+        # 改动一两个档位, 偶尔删除一档再补一档
+        self.seq += 1
+        asks, bids = [], []
+        for side, changes, sign in ((self.asks, asks, 1), (self.bids, bids, -1)):
+            price = self.rng.choice(list(side))
+            if self.rng.random() < 0.2 and len(side) > 1:
+                del side[price]
+                changes.append([price, '0'])
+                edge = max(side, key=lambda item: sign * float(item))
+                price = self.price(float(edge) + sign * self.tick)
+            side[price] = self.size()
+            changes.append([price, side[price]])
+        return asks, bids
+
+
+class MockConnection:
+    def __init__(self, websocket):
+        self.websocket = websocket
+        # channel -> MockBook, 订阅之后按 rate 推送
+        self.channels = {}
+        self.pongs = 0
+
+
+class MockServer(metaclass=ABCMeta):
+    # rate 为每个已订阅 channel 每秒推送的消息数, symbols 为全市场数据 (如 binance !ticker@arr) 的交易对数量
+    path = '/'
+    ping_interval = 0
+
+    def __init__(self, host='127.0.0.1', port=0, rate=10, symbols=10, levels=5, seed=0):
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.symbols = symbols
+        self.levels = levels
+        self.rng = random.Random(seed)
+        self.server = None
+        self.connections = set()
+        self.sent_messages = 0
+        self.sent_bytes = 0
+        self.requests = 0
+
+    @property
+    def ws_uri(self):
+        return f'ws://{self.host}:{self.port}{self.path}'
+
+    async def start(self):
+        self.server = await websockets.serve(self.handler, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    async def handler(self, websocket, path=None):
+        conn = MockConnection(websocket)
+        self.connections.add(conn)
+        tasks = [asyncio.create_task(self.publish(conn))]
+        if self.ping_interval > 0:
+            tasks.append(asyncio.create_task(self.ping(conn)))
+        try:
+            await self.on_connect(conn)
+            async for msg in websocket:
+                self.requests += 1
+                await self.on_request(conn, msg)
+        except websockets.ConnectionClosed:
+            pass
+        except Exception as e:
+            logger.exception(e)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.connections.discard(conn)
+
+    async def send(self, conn, data):
+        frame = self.encode(data)
+        self.sent_messages += 1
+        self.sent_bytes += len(frame)
+        await conn.websocket.send(frame)
+
+    def encode(self, data):
+        return json.dumps(data)
+
+    def subscribe(self, conn, channel):
+        if channel not in conn.channels:
+            conn.channels[channel] = MockBook(self.rng, self.levels)
+        return conn.channels[channel]
+
+    def unsubscribe(self, conn, channel):
+        conn.channels.pop(channel, None)
+
+    async def publish(self, conn):
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.rate
+        next_time = loop.time()
+        try:
+            while True:
+                for channel, book in list(conn.channels.items()):
+                    await self.send(conn, self.make_frame(channel, book))
+                next_time += interval
+                delay = next_time - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    # 发送跟不上 rate 时不累积欠账
+                    next_time = loop.time()
+                    await asyncio.sleep(0)
+        except websockets.ConnectionClosed:
+            pass
+
+    async def ping(self, conn):
+        try:
+            while True:
+                await asyncio.sleep(self.ping_interval)
+                await self.send(conn, self.make_ping())
+        except websockets.ConnectionClosed:
+            pass
+
+    async def on_connect(self, conn):
+        pass
+
+    @abstractmethod
+    async def on_request(self, conn, msg):
+        pass
+
+    @abstractmethod
+    def make_frame(self, channel, book):
+        pass
+
+    def make_ping(self):
+        return {'ping': now_ms()}
+
+
+class binance_server(MockServer):
+    # combined stream: SET_PROPERTY / SUBSCRIBE / UNSUBSCRIBE
+    # futures 为 True 时 diff depth 按合约格式推送: 带 pu, 相邻两条之间的 update id 可以不连续
+    path = '/ws/stream'
+
+    def __init__(self, *args, futures=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.futures = futures
+
+    async def on_request(self, conn, msg):
+        req = json.loads(msg)
+        if req['method'] == 'SUBSCRIBE':
+            for stream in req['params']:
+                self.subscribe(conn, stream)
+        elif req['method'] == 'UNSUBSCRIBE':
+            for stream in req['params']:
+                self.unsubscribe(conn, stream)
+        await self.send(conn, {'result': None, 'id': req['id']})
+
+    def make_frame(self, channel, book):
+        market_id, _, kind = channel.partition('@')
+        market_id = market_id.upper()
+        timestamp = now_ms()
+        if kind == 'aggTrade':
+            price, _ = book.snapshot()[0][0]
+            data = {'e': 'aggTrade', 'E': timestamp, 's': market_id, 'a': book.seq, 'p': price,
+                    'q': book.size(), 'f': book.seq, 'l': book.seq, 'T': timestamp,
+                    'm': self.rng.random() < 0.5, 'M': True}
+        elif kind == 'arr':
+            data = [self.make_ticker(f'COIN{i}USDT', timestamp) for i in range(self.symbols)]
+        elif kind == 'depth@100ms':
+            last_id = book.seq
+            if self.futures:
+                book.seq += self.rng.randint(0, 3)
+            first_id = book.seq + 1
+            asks, bids = book.delta()
+            data = {'e': 'depthUpdate', 'E': timestamp, 's': market_id, 'U': first_id, 'u': book.seq,
+                    'b': bids, 'a': asks}
+            if self.futures:
+                data['T'] = timestamp
+                data['pu'] = last_id
+        elif kind == 'bookTicker':
+            asks, bids = book.snapshot()
+            data = {'u': book.seq, 's': market_id, 'b': bids[0][0], 'B': bids[0][1],
+                    'a': asks[0][0], 'A': asks[0][1]}
+        else:
+            asks, bids = book.snapshot()
+            data = {'lastUpdateId': book.seq, 'bids': bids, 'asks': asks}
+        return {'stream': channel, 'data': data}
+
+    def make_ticker(self, market_id, timestamp):
+        last = self.rng.uniform(1, 1000)
+        return {'e': '24hrTicker', 'E': timestamp, 's': market_id, 'p': '0.1', 'P': '1.0', 'w': f'{last:.4f}',
+                'x': f'{last:.4f}', 'c': f'{last:.4f}', 'Q': '1', 'b': f'{last * 0.999:.4f}', 'B': '1',
+                'a': f'{last * 1.001:.4f}', 'A': '1', 'o': f'{last:.4f}', 'h': f'{last * 1.01:.4f}',
+                'l': f'{last * 0.99:.4f}', 'v': '1000', 'q': f'{last * 1000:.4f}', 'O': timestamp - 86400000,
+                'C': timestamp, 'F': 0, 'L': 1, 'n': 2}
+
+    async def fetch_order_book(self, symbol, limit=None, params={}):
+        # 代替 REST 快照: ws.exchange.fetch_order_book = server.fetch_order_book
+        # 返回当前连接里该交易对的 diff depth 状态
+        # 合约的 symbol 带结算币种, 如 BTC/USDT:USDT
+        market_id = symbol.split(':')[0].replace('/', '').lower()
+        for conn in self.connections:
+            book = conn.channels.get(f'{market_id}@depth@100ms')
+            if book is not None:
+                asks, bids = book.current()
+                return {'symbol': symbol, 'asks': [[float(p), float(v)] for p, v in asks],
+                        'bids': [[float(p), float(v)] for p, v in bids], 'nonce': book.seq}
+        raise RuntimeError(f'{symbol} diff depth is not subscribed')
+
+
+class huobipro_server(MockServer):
+    # gzip 压缩, 服务器 ping 客户端 pong
+    path = '/ws'
+    ping_interval = 5
+
+    def encode(self, data):
+        return gzip.compress(json.dumps(data).encode())
+
+    async def on_request(self, conn, msg):
+        req = json.loads(msg)
+        if 'pong' in req:
+            conn.pongs += 1
+        elif 'sub' in req:
+            self.subscribe(conn, req['sub'])
+            await self.send(conn, {'id': req.get('id'), 'status': 'ok', 'subbed': req['sub'], 'ts': now_ms()})
+        elif 'unsub' in req:
+            self.unsubscribe(conn, req['unsub'])
+            await self.send(conn, {'id': req.get('id'), 'status': 'ok', 'unsubbed': req['unsub'], 'ts': now_ms()})
+
+    def make_frame(self, channel, book):
+        asks, bids = book.snapshot()
+        timestamp = now_ms()
+        if channel.endswith('.bbo'):
+            return {'ch': channel, 'ts': timestamp, 'tick': {
+                'seqId': book.seq, 'ask': float(asks[0][0]), 'askSize': float(asks[0][1]),
+                'bid': float(bids[0][0]), 'bidSize': float(bids[0][1]), 'quoteTime': timestamp,
+                'symbol': channel.split('.')[1]}}
+        return {'ch': channel, 'ts': timestamp, 'tick': {
+            'seqNum': book.seq, 'asks': [[float(p), float(v)] for p, v in asks],
+            'bids': [[float(p), float(v)] for p, v in bids]}}
+
+
+class biki_server(huobipro_server):
+    path = '/kline-api/ws'
+
+    async def on_request(self, conn, msg):
+        req = json.loads(msg)
+        if 'pong' in req:
+            conn.pongs += 1
+        elif req.get('event') == 'sub':
+            self.subscribe(conn, req['params']['channel'])
+        elif req.get('event') == 'unsub':
+            self.unsubscribe(conn, req['params']['channel'])
+
+    def make_frame(self, channel, book):
+        asks, bids = book.snapshot()
+        return {'channel': channel, 'ts': now_ms(), 'tick': {'asks': asks, 'buys': bids}}
+
+
+class okex_server(MockServer):
+    # v3, raw deflate 压缩
+    path = '/ws/v3'
+
+    def encode(self, data):
+        compressor = zlib.compressobj(wbits=-15)
+        return compressor.compress(json.dumps(data).encode()) + compressor.flush()
+
+    async def on_request(self, conn, msg):
+        if msg == 'ping':
+            await conn.websocket.send('pong')
+            return
+        req = json.loads(msg)
+        for channel in req['args']:
+            if req['op'] == 'subscribe':
+                self.subscribe(conn, channel)
+            else:
+                self.unsubscribe(conn, channel)
+            await self.send(conn, {'event': req['op'], 'channel': channel})
+
+    def make_frame(self, channel, book):
+        table, _, instrument_id = channel.partition(':')
+        asks, bids = book.snapshot()
+        if table == 'spot/ticker':
+            return {'table': table, 'data': [{
+                'instrument_id': instrument_id, 'last': bids[0][0], 'last_qty': '1',
+                'best_bid': bids[0][0], 'best_bid_size': bids[0][1], 'best_ask': asks[0][0], 'best_ask_size': asks[0][1],
+                'open_24h': bids[0][0], 'high_24h': asks[0][0], 'low_24h': bids[0][0],
+                'base_volume_24h': '1000', 'quote_volume_24h': '1000', 'timestamp': iso8601(now_ms())}]}
+        return {'table': table, 'data': [{
+            'instrument_id': instrument_id, 'asks': [level + ['0', '1'] for level in asks],
+            'bids': [level + ['0', '1'] for level in bids], 'timestamp': iso8601(now_ms())}]}
+
+
+class kucoin_server(MockServer):
+    # 先通过 bullet_public 拿到 endpoint/token, 连接后服务器发 welcome
+    # exchange.publicPostBulletPublic = server.bullet_public
+    path = '/endpoint'
+
+    async def bullet_public(self, params={}):
+        return {'code': '200000', 'data': {'token': 'mock', 'instanceServers': [{
+            'endpoint': self.ws_uri, 'encrypt': False, 'protocol': 'websocket',
+            'pingInterval': 18000, 'pingTimeout': 10000}]}}
+
+    async def on_connect(self, conn):
+        await self.send(conn, {'id': str(now_ms()), 'type': 'welcome'})
+
+    async def on_request(self, conn, msg):
+        req = json.loads(msg)
+        if req['type'] == 'ping':
+            await self.send(conn, {'id': req['id'], 'type': 'pong'})
+            return
+        topic, _, symbols = req['topic'].partition(':')
+        for symbol in symbols.split(','):
+            if req['type'] == 'subscribe':
+                self.subscribe(conn, f'{topic}:{symbol}')
+            else:
+                self.unsubscribe(conn, f'{topic}:{symbol}')
+        if req.get('response'):
+            await self.send(conn, {'id': req['id'], 'type': 'ack'})
+
+    def make_frame(self, channel, book):
+        asks, bids = book.snapshot()
+        if channel.startswith('/spotMarket/level1:'):
+            return {'type': 'message', 'topic': channel, 'subject': 'level1',
+                    'data': {'asks': asks[0], 'bids': bids[0], 'timestamp': now_ms()}}
+        return {'type': 'message', 'topic': channel, 'subject': 'level2',
+                'data': {'asks': asks, 'bids': bids, 'timestamp': now_ms()}}
+
+
+class mxc_server(MockServer):
+    # socket.io: 0 握手, 40 连接, 42 事件, 2/3 ping/pong
+    path = '/socket.io/'
+
+    def encode(self, data):
+        return data if isinstance(data, str) else '42' + json.dumps(data)
+
+    async def on_connect(self, conn):
+        await conn.websocket.send('0' + json.dumps({'sid': 'mock', 'pingInterval': 25000, 'pingTimeout': 60000}))
+        await conn.websocket.send('40')
+
+    async def on_request(self, conn, msg):
+        if msg == '2':
+            await self.send(conn, '3')
+            return
+        event, params = json.loads(msg[2:])
+        symbol = params['symbol']
+        if event == 'sub.symbol':
+            self.subscribe(conn, symbol)
+        elif event == 'unsub.symbol':
+            self.unsubscribe(conn, symbol)
+        elif event == 'get.depth':
+            book = self.subscribe(conn, symbol)
+            asks, bids = book.snapshot()
+            await self.send(conn, ['rs.depth', {'symbol': symbol, 'data': self.levels_data(asks, bids)}])
+
+    @staticmethod
+    def levels_data(asks, bids):
+        return {'asks': [{'p': p, 'q': v} for p, v in asks], 'bids': [{'p': p, 'q': v} for p, v in bids]}
+
+    def make_frame(self, channel, book):
+        asks, bids = book.delta()
+        return ['push.symbol', {'symbol': channel, 'data': self.levels_data(asks, bids)}]
+
+
+class poloniex_server(MockServer):
+    # 首条为 i 全量, 之后是 o 增量, 1010 心跳
+    ping_interval = 1
+
+    async def on_request(self, conn, msg):
+        req = json.loads(msg)
+        channel = req['channel']
+        if req['command'] == 'subscribe':
+            book = self.subscribe(conn, channel)
+            asks, bids = book.snapshot()
+            await self.send(conn, [channel, book.seq, [['i', {
+                'currencyPair': str(channel), 'orderBook': [dict(asks), dict(bids)]}]]])
+        else:
+            self.unsubscribe(conn, channel)
+
+    def make_ping(self):
+        return [1010]
+
+    def make_frame(self, channel, book):
+        asks, bids = book.delta()
+        events = [['o', 0, p, v] for p, v in asks] + [['o', 1, p, v] for p, v in bids]
+        return [channel, book.seq, events]
+
+
+class gateio_server(MockServer):
+    # depth.subscribe 每次覆盖之前的订阅, 先推 clean=True 的全量再推增量
+    path = '/v3/'
+    subscribe_method = 'depth.subscribe'
+
+    async def on_request(self, conn, msg):
+        req = json.loads(msg)
+        if req['method'] == 'server.ping':
+            await self.send(conn, {'error': None, 'result': 'pong', 'id': req['id']})
+            return
+        if req['method'] == self.subscribe_method:
+            channels = [params[0] for params in req['params']]
+            for channel in list(conn.channels):
+                if channel not in channels:
+                    self.unsubscribe(conn, channel)
+            for channel in channels:
+                if channel not in conn.channels:
+                    book = self.subscribe(conn, channel)
+                    asks, bids = book.snapshot()
+                    await self.send(conn, self.depth_update(True, asks, bids, channel))
+        elif req['method'] == 'depth.unsubscribe':
+            conn.channels.clear()
+        await self.send(conn, {'error': None, 'result': {'status': 'success'}, 'id': req['id']})
+
+    @staticmethod
+    def depth_update(clean, asks, bids, channel):
+        return {'method': 'depth.update', 'params': [clean, {'asks': asks, 'bids': bids}, channel], 'id': None}
+
+    def make_frame(self, channel, book):
+        asks, bids = book.delta()
+        return self.depth_update(False, asks, bids, channel)
+
+
+class coinex_server(gateio_server):
+    path = '/'
+    subscribe_method = 'depth.subscribe_multi'
+
+
+class bibox_server(MockServer):
+    # 深度数据 gzip + base64 之后放在 data 字段
+    async def on_request(self, conn, msg):
+        req = json.loads(msg)
+        if 'ping' in req:
+            await self.send(conn, {'pong': req['ping']})
+        elif req.get('event') == 'addChannel':
+            self.subscribe(conn, req['channel'])
+        elif req.get('event') == 'removeChannel':
+            self.unsubscribe(conn, req['channel'])
+
+    def make_frame(self, channel, book):
+        asks, bids = book.snapshot()
+        pair = channel[len('bibox_sub_spot_'):-len('_depth')]
+        data = {'pair': pair, 'update_time': now_ms(),
+                'asks': [{'price': p, 'volume': v} for p, v in asks],
+                'bids': [{'price': p, 'volume': v} for p, v in bids]}
+        payload = base64.b64encode(gzip.compress(json.dumps(data).encode())).decode()
+        return [{'channel': channel, 'binary': '1', 'data_type': 1, 'data': payload}]
+
+
+class ascendex_server(MockServer):
+    path = '/0/api/pro/v1/stream'
+    ping_interval = 15
+
+    async def on_connect(self, conn):
+        await self.send(conn, {'m': 'connected', 'type': 'unauth'})
+
+    async def on_request(self, conn, msg):
+        req = json.loads(msg)
+        if req['op'] == 'pong':
+            conn.pongs += 1
+        elif req['op'] == 'ping':
+            await self.send(conn, {'m': 'pong', 'hp': 3})
+        elif req['op'] == 'sub':
+            self.subscribe(conn, req['ch'].partition(':')[2])
+        elif req['op'] == 'unsub':
+            self.unsubscribe(conn, req['ch'].partition(':')[2])
+        elif req['op'] == 'req':
+            symbol = req['args']['symbol']
+            book = self.subscribe(conn, symbol)
+            asks, bids = book.snapshot()
+            await self.send(conn, self.depth('depth-snapshot', symbol, book, asks, bids))
+
+    def make_ping(self):
+        return {'m': 'ping', 'hp': 3}
+
+    @staticmethod
+    def depth(method, symbol, book, asks, bids):
+        return {'m': method, 'symbol': symbol, 'data': {
+            'ts': now_ms(), 'seqnum': book.seq, 'asks': asks, 'bids': bids}}
+
+    def make_frame(self, channel, book):
+        asks, bids = book.delta()
+        return self.depth('depth', channel, book, asks, bids)
+
+
+class hitbtc_server(MockServer):
+    path = '/api/2/ws/public'
+
+    async def on_request(self, conn, msg):
+        req = json.loads(msg)
+        symbol = req['params']['symbol']
+        if req['method'] == 'subscribeOrderbook':
+            book = self.subscribe(conn, symbol)
+            await self.send(conn, {'jsonrpc': '2.0', 'result': True, 'id': req['id']})
+            asks, bids = book.snapshot()
+            await self.send(conn, self.orderbook('snapshotOrderbook', symbol, book, asks, bids))
+        elif req['method'] == 'unsubscribeOrderbook':
+            self.unsubscribe(conn, symbol)
+            await self.send(conn, {'jsonrpc': '2.0', 'result': True, 'id': req['id']})
+
+    @staticmethod
+    def orderbook(method, symbol, book, asks, bids):
+        return {'jsonrpc': '2.0', 'method': method, 'params': {
+            'ask': [{'price': p, 'size': v} for p, v in asks], 'bid': [{'price': p, 'size': v} for p, v in bids],
+            'symbol': symbol, 'sequence': book.seq, 'timestamp': iso8601(now_ms())}}
+
+    def make_frame(self, channel, book):
+        asks, bids = book.delta()
+        return self.orderbook('updateOrderbook', channel, book, asks, bids)
+
+
+servers = {
+    'binance': binance_server,
+    'huobipro': huobipro_server,
+    'biki': biki_server,
+    'okex': okex_server,
+    'kucoin': kucoin_server,
+    'mxc': mxc_server,
+    'poloniex': poloniex_server,
+    'gateio': gateio_server,
+    'coinex': coinex_server,
+    'bibox': bibox_server,
+    'ascendex': ascendex_server,
+    'hitbtc': hitbtc_server,
+}
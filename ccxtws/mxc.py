@@ -13,48 +13,54 @@ class mxc(Exchange):
 
     async def _run(self):
         async with websockets.connect(self.ws_uri, ping_interval=None) as websocket:
-            self.ws_conn = websocket
-            added_channels = set()
+            self.open_connection(websocket)
             while True:
-                for channel in self.channels:
-                    if channel in added_channels:
-                        continue
-                    added_channels.add(channel)
-                    req = json.dumps(["sub.symbol", {"symbol": channel}])
-                    await websocket.send(f"42{req}")
-                    req = json.dumps(["get.depth", {"symbol": channel}])
-                    await websocket.send(f"42{req}")
-                resp = await websocket.recv()
-                if resp.startswith('42'):
-                    data = json.loads(resp.lstrip('42'))
-                    if data[0] in ['push.symbol', 'rs.depth']:
-                        self.notify(data)
-                    else:
-                        logger.warning("unknown data %s", data)
-                elif resp.startswith('3'):
-                    # ping pong
-                    pass
-                else:
-                    logger.warning("unknown data %s", resp)
+                await self.handle_message(await self.recv(websocket))
+
+    def get_subscribe_messages(self, keys):
+        messages = []
+        for key in keys:
+            messages.append(f'42{self.codec.dumps(["sub.symbol", {"symbol": key}])}')
+            messages.append(f'42{self.codec.dumps(["get.depth", {"symbol": key}])}')
+        return messages
+
+    def get_unsubscribe_messages(self, keys):
+        return [f'42{self.codec.dumps(["unsub.symbol", {"symbol": key}])}' for key in keys]
+
+    @staticmethod
+    def decompress(resp):
+        # socket.io 帧: 42 为事件, 3 为 pong, 其它帧原样包一层交给 on_data 记录
+        if resp.startswith('42'):
+            return resp[2:]
+        if resp.startswith('3'):
+            return 'null'
+        return json.dumps(['unknown', resp])
+
+    def on_data(self, data):
+        if data is None:
+            # ping pong
+            return
+        if data[0] in ['push.symbol', 'rs.depth']:
+            self.notify(data)
+        else:
+            logger.warning("unknown data %s", data)
 
     async def _ping(self):
         await self.ws_conn.send("2")
 
     def notify(self, data):
+        key = data[1]['symbol']
+        if not self.accept(key):
+            return
         final_data = {'asks': [], 'bids': []}
         if data[0] == 'rs.depth':
             final_data['full'] = True
         else:
             final_data['full'] = False
-        if 'asks' in data[1]['data']:
-            final_data['asks'] = [[float(item['p']), float(item['q'])] for item in data[1]['data']['asks']]
-        if 'bids' in data[1]['data']:
-            final_data['bids'] = [[float(item['p']), float(item['q'])] for item in data[1]['data']['bids']]
+        final_data['asks'] = self.parse_levels(data[1]['data'].get('asks', []), 'p', 'q')
+        final_data['bids'] = self.parse_levels(data[1]['data'].get('bids', []), 'p', 'q')
 
-        for observer in self.observers:
-            if observer.channel != data[1]['symbol']:
-                continue
-            observer.update(final_data)
+        self.dispatch(key, final_data, data)
 
 
 class mxc_observer(ExchangeObserver):
@@ -1,7 +1,7 @@
-import json
 import zlib
 import websockets
 from ccxtws.base import Exchange, ExchangeObserver, logger
+from . import utils
 
 
 class okex(Exchange):
@@ -13,37 +13,67 @@ class okex(Exchange):
 
     async def _run(self):
         async with websockets.connect(self.ws_uri) as websocket:
-            self.ws_conn = websocket
-            is_added = False
+            self.open_connection(websocket)
             while True:
-                params = {"op": "subscribe", "args": [f'spot/depth5:{item}' for item in self.channels]}
-                if not is_added:
-                    req = json.dumps(params)
-                    await websocket.send(req)
-                    is_added = True
-                resp = await websocket.recv()
-                decoded_data = zlib.decompress(resp, -15)
-                data = json.loads(decoded_data)
-                if 'table' in data and data['table'] == 'spot/depth5':
-                    self.notify(data)
-                else:
-                    logger.warning("unknown data %s", data)
+                await self.handle_message(await self.recv(websocket))
+
+    @staticmethod
+    def get_topic(key):
+        # 深度的 key 为 instrument_id, 盘口的 key 为 'bbo:' + instrument_id, 盘口用 spot/ticker 里的 best_bid/best_ask
+        if key.startswith('bbo:'):
+            return f'spot/ticker:{key[4:]}'
+        return f'spot/depth5:{key}'
+
+    def get_subscribe_messages(self, keys):
+        return [self.codec.dumps({"op": "subscribe", "args": [self.get_topic(key) for key in keys]})]
+
+    def get_unsubscribe_messages(self, keys):
+        return [self.codec.dumps({"op": "unsubscribe", "args": [self.get_topic(key) for key in keys]})]
+
+    @staticmethod
+    def decompress(resp):
+        return zlib.decompress(resp, -15)
+
+    def on_data(self, data):
+        if 'table' in data and data['table'] in ('spot/depth5', 'spot/ticker'):
+            self.notify(data)
+        else:
+            logger.warning("unknown data %s", data)
+
+    def get_timestamp(self, data):
+        return utils.iso8601_to_ms(data['data'][0].get('timestamp'))
 
     def notify(self, data):
+        key = data['data'][0]['instrument_id']
+        if data['table'] == 'spot/ticker':
+            key = 'bbo:' + key
+            if not self.accept(key):
+                return
+            ticker = data['data'][0]
+            bbo = self.make_bbo(key, self.get_observers(key)[0].symbol, float(ticker['best_bid']), float(ticker['best_bid_size']),
+                                float(ticker['best_ask']), float(ticker['best_ask_size']), self.get_timestamp(data))
+            if bbo is not None:
+                self.dispatch(key, bbo, data)
+            return
+        if not self.accept(key):
+            return
         final_data = {'full': True, 'asks': [], 'bids': []}
-        final_data['asks'] = [[float(item[0]), float(item[1])] for item in data['data'][0]['asks']]
-        final_data['bids'] = [[float(item[0]), float(item[1])] for item in data['data'][0]['bids']]
-
-        for observer in self.observers:
-            if observer.channel != data['data'][0]['instrument_id']:
-                continue
-            observer.update(final_data)
+        final_data['asks'] = self.parse_levels(data['data'][0]['asks'])
+        final_data['bids'] = self.parse_levels(data['data'][0]['bids'])
+        self.dispatch(key, final_data, data)
 
 
 class okex_observer(ExchangeObserver):
-    def __init__(self, exchange, symbol, callback):
+    # feed_type='bbo' 订阅 spot/ticker, 只在最优买卖价或数量变化时收到 BBO
+    def __init__(self, exchange, symbol, callback, feed_type='depth'):
         market = exchange.market(symbol)
-        self.channel = market['id']
+        self.symbol = market['symbol']
+        if feed_type == 'depth':
+            self.channel = market['id']
+        elif feed_type == 'bbo':
+            self.channel = 'bbo:' + market['id']
+        else:
+            raise ValueError(f"unknown feed type {feed_type}, expected depth or bbo")
         self.callback = callback
 
     def update(self, data):
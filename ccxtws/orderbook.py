@@ -0,0 +1,174 @@
+import time
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from . import utils
+
+# 最优买卖价, 不可变, 只在变化时交给 callback, 见 bbo_callback 和 binance/huobipro/okex/kucoin 的 bbo feed
+BBO = namedtuple('BBO', ['symbol', 'bid', 'bid_volume', 'ask', 'ask_volume', 'timestamp'])
+
+
+class OrderBookSide:
+    # 价格按 key 升序存放在 array('d') 里, bids 用负价格做 key, 这样两边都是最优价在前
+    def __init__(self, reverse=False):
+        self.reverse = reverse
+        self.keys = array('d')
+        self.volumes = array('d')
+
+    def __len__(self):
+        return len(self.keys)
+
+    def clear(self):
+        del self.keys[:]
+        del self.volumes[:]
+
+    def update(self, price, volume):
+        # 查找 O(log n), 新增/删除价位是 array 的 insert/del, 需要移动后面的元素, O(n)
+        # 交易所推送的深度一般只有几百到几千档, 连续内存上的 memmove 比平衡树/跳表的指针操作更快,
+        # 所以有意不用 O(log n) 的结构; 档位上万并且频繁在中间增删时需要换成 sortedcontainers 之类
+        key = -price if self.reverse else price
+        keys = self.keys
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            if volume:
+                self.volumes[i] = volume
+            else:
+                del keys[i]
+                del self.volumes[i]
+        elif volume:
+            keys.insert(i, key)
+            self.volumes.insert(i, volume)
+
+    def update_levels(self, levels):
+        if hasattr(levels, 'tolist'):
+            # book_format 为 numpy 时的 ndarray
+            levels = levels.tolist()
+        for price, volume in levels:
+            self.update(float(price), float(volume))
+
+    def replace(self, levels):
+        self.clear()
+        self.update_levels(levels)
+
+    def best(self):
+        if not self.keys:
+            return None
+        price = -self.keys[0] if self.reverse else self.keys[0]
+        return [price, self.volumes[0]]
+
+    def get(self, price):
+        key = -price if self.reverse else price
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.volumes[i]
+        return 0.0
+
+    def levels(self, depth=None):
+        keys = self.keys if depth is None else self.keys[:depth]
+        if self.reverse:
+            return [[-key, volume] for key, volume in zip(keys, self.volumes)]
+        return [[key, volume] for key, volume in zip(keys, self.volumes)]
+
+    def to_numpy(self, depth=None):
+        np = utils.np
+        if np is None:
+            raise ImportError("OrderBook.to_numpy requires numpy")
+        count = len(self.keys) if depth is None else min(depth, len(self.keys))
+        levels = np.empty((count, 2), dtype=np.float64)
+        if count:
+            # 直接从 array 的内存拷贝, 临时 view 释放后 array 才能继续增删
+            levels[:, 0] = np.frombuffer(self.keys, dtype=np.float64, count=count)
+            levels[:, 1] = np.frombuffer(self.volumes, dtype=np.float64, count=count)
+            if self.reverse:
+                levels[:, 0] *= -1
+        return levels
+
+
+class OrderBook:
+    # 维护单个交易对的本地深度, 接收 observer 的 data: {full: bool, 'asks': [...], 'bids': [...]}
+    def __init__(self, symbol=None):
+        self.symbol = symbol
+        self.asks = OrderBookSide()
+        self.bids = OrderBookSide(reverse=True)
+        self.nonce = None
+        # 收到第一个全量快照之前, 增量数据无法合并
+        self.is_synced = False
+
+    def clear(self):
+        self.asks.clear()
+        self.bids.clear()
+        self.nonce = None
+        self.is_synced = False
+
+    def apply(self, data):
+        if not data:
+            # wipe_cache 发出的空 dict, 连接已断开
+            self.clear()
+            return False
+        if data.get('full'):
+            self.asks.replace(data['asks'])
+            self.bids.replace(data['bids'])
+            self.is_synced = True
+            return True
+        if not self.is_synced:
+            return False
+        self.asks.update_levels(data['asks'])
+        self.bids.update_levels(data['bids'])
+        return True
+
+    def best_ask(self):
+        return self.asks.best()
+
+    def best_bid(self):
+        return self.bids.best()
+
+    def to_dict(self, depth=None):
+        return {'full': True, 'asks': self.asks.levels(depth), 'bids': self.bids.levels(depth)}
+
+    def to_numpy(self, depth=None):
+        return {'full': True, 'asks': self.asks.to_numpy(depth), 'bids': self.bids.to_numpy(depth)}
+
+
+class book_callback:
+    # 把 observer 的全量/增量数据合并进 OrderBook, 再把整理好的 book 交给 callback
+    # huobipro_observer(exchange, symbol, book_callback(callback))
+    def __init__(self, callback, symbol=None):
+        self.callback = callback
+        self.book = OrderBook(symbol)
+
+    def __call__(self, data):
+        if self.book.apply(data) or not data:
+            self.callback(self.book)
+
+
+class bbo_callback:
+    # 交易所没有原生盘口 channel 时使用: 合并深度后, 最优买卖价或数量有变化才把 BBO 交给 callback, 连接断开时交给 None
+    # gateio_observer(exchange, symbol, bbo_callback(callback, symbol))
+    def __init__(self, callback, symbol=None):
+        self.callback = callback
+        self.book = OrderBook(symbol)
+        self.last = None
+
+    def __call__(self, data):
+        book = self.book
+        if not book.apply(data):
+            if not data and self.last is not None:
+                self.last = None
+                self.callback(None)
+            return
+        asks = book.asks
+        bids = book.bids
+        if asks.keys:
+            ask, ask_volume = asks.keys[0], asks.volumes[0]
+        else:
+            ask = ask_volume = None
+        if bids.keys:
+            bid, bid_volume = -bids.keys[0], bids.volumes[0]
+        else:
+            bid = bid_volume = None
+        last = self.last
+        if last is not None and last.bid == bid and last.ask == ask \
+                and last.bid_volume == bid_volume and last.ask_volume == ask_volume:
+            return
+        self.last = BBO(book.symbol, bid, bid_volume, ask, ask_volume, data.get('timestamp') or int(time.time() * 1000))
+        self.callback(self.last)
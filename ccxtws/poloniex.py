@@ -1,4 +1,3 @@
-import json
 import websockets
 from ccxtws.base import Exchange, ExchangeObserver, logger
 
@@ -12,33 +11,35 @@ class poloniex(Exchange):
 
     async def _run(self):
         async with websockets.connect(self.ws_uri) as websocket:
-            self.ws_conn = websocket
-            added_channels = set()
+            self.open_connection(websocket)
             while True:
-                for channel in self.channels:
-                    if channel in added_channels:
-                        continue
-                    added_channels.add(channel)
-                    req = json.dumps({"command": "subscribe", "channel": channel})
-                    await websocket.send(req)
-                resp = await websocket.recv()
-                data = json.loads(resp)
-                if data[0] == 1010:
-                    continue
-                else:
-                    self.notify(data)
+                await self.handle_message(await self.recv(websocket))
+
+    def get_subscribe_messages(self, keys):
+        return [self.codec.dumps({"command": "subscribe", "channel": key}) for key in keys]
+
+    def get_unsubscribe_messages(self, keys):
+        return [self.codec.dumps({"command": "unsubscribe", "channel": key}) for key in keys]
+
+    def on_data(self, data):
+        if data[0] == 1010:
+            # 心跳
+            return
+        self.notify(data)
 
     def notify(self, data):
         final_data = {'asks': [], 'bids': []}
         if len(data) >= 3:
+            if not self.accept(data[0]):
+                return
             if data[2][0][0] == 'i':
                 final_data['full'] = True
-                final_data['asks'] = [[float(p), float(v)] for p, v in data[2][0][1]['orderBook'][0].items()]
-                final_data['bids'] = [[float(p), float(v)] for p, v in data[2][0][1]['orderBook'][1].items()]
+                final_data['asks'] = self.parse_levels(list(data[2][0][1]['orderBook'][0].items()))
+                final_data['bids'] = self.parse_levels(list(data[2][0][1]['orderBook'][1].items()))
             elif data[2][0][0] == 'o':
                 final_data['full'] = False
-                final_data['asks'] = [[float(item[2]), float(item[3])] for item in data[2] if item[0] == 'o' and item[1] == 0]
-                final_data['bids'] = [[float(item[2]), float(item[3])] for item in data[2] if item[0] == 'o' and item[1] == 1]
+                final_data['asks'] = self.parse_levels([item for item in data[2] if item[0] == 'o' and item[1] == 0], 2, 3)
+                final_data['bids'] = self.parse_levels([item for item in data[2] if item[0] == 'o' and item[1] == 1], 2, 3)
             else:
                 logger.warning("unknown data %s", data)
                 return
@@ -46,10 +47,7 @@ class poloniex(Exchange):
             logger.warning("unknown data %s", data)
             return
 
-        for observer in self.observers:
-            if observer.channel != data[0]:
-                continue
-            observer.update(final_data)
+        self.dispatch(data[0], final_data, data)
 
 
 class poloniex_observer(ExchangeObserver):
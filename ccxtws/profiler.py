@@ -0,0 +1,78 @@
+import time
+
+# recv: 等待 websocket.recv, 包括空闲时间
+# decompress: gzip/deflate 等解压, decode: json 解析
+# notify: on_data/notify 里的解析和整理, 已扣除 callback
+# callback: observer.update 及用户回调
+STAGES = ('recv', 'decompress', 'decode', 'notify', 'callback')
+
+
+class StageProfiler:
+    # exchange.profiler = StageProfiler()            每条消息都计时
+    # exchange.profiler = StageProfiler(every=100)   每 100 条抽样 1 条
+    # 不设置 (None) 时热路径上只多一次 is None 判断
+    def __init__(self, every=1):
+        self.every = every
+        self.counter = 0
+        # stage -> [count, total, max]
+        self.stats = {stage: [0, 0.0, 0.0] for stage in STAGES}
+        self.last_recv = 0.0
+        # 正在计时的消息里 observer 调用的累计耗时, 见 Exchange.dispatch
+        self.active = False
+        self.callback_time = 0.0
+
+    def sample(self):
+        self.counter += 1
+        return self.counter % self.every == 0
+
+    def add(self, stage, elapsed):
+        stats = self.stats[stage]
+        stats[0] += 1
+        stats[1] += elapsed
+        if elapsed > stats[2]:
+            stats[2] = elapsed
+
+    def run(self, exchange, resp):
+        # 和 Exchange.on_message 同样的流程, 分段计时
+        perf_counter = time.perf_counter
+        self.add('recv', self.last_recv)
+        start = perf_counter()
+        resp = exchange.decompress(resp)
+        decompressed = perf_counter()
+        data = exchange.codec.loads(resp)
+        decoded = perf_counter()
+        self.add('decompress', decompressed - start)
+        self.add('decode', decoded - decompressed)
+        return self.run_data(exchange, data)
+
+    def run_data(self, exchange, data):
+        # executor 模式下解压和 json 在池里执行, 只统计 notify 和 callback
+        start = time.perf_counter()
+        self.active = True
+        self.callback_time = 0.0
+        try:
+            return exchange.on_data(data)
+        finally:
+            self.active = False
+            self.add('callback', self.callback_time)
+            self.add('notify', time.perf_counter() - start - self.callback_time)
+
+    def call_observers(self, observers, data):
+        start = time.perf_counter()
+        try:
+            for observer in observers:
+                observer.update(data)
+        finally:
+            self.callback_time += time.perf_counter() - start
+
+    def report(self):
+        return {stage: {
+            'count': count,
+            'total': total,
+            'mean_us': total / count * 1e6 if count else 0.0,
+            'max_us': maximum * 1e6,
+        } for stage, (count, total, maximum) in self.stats.items()}
+
+    def reset(self):
+        self.counter = 0
+        self.stats = {stage: [0, 0.0, 0.0] for stage in STAGES}
@@ -0,0 +1,123 @@
+import asyncio
+import mmap
+import os
+import struct
+import time
+from ccxtws.base import logger, current_exchange
+
+# 文件格式: MAGIC 之后是连续的记录, 只追加写
+# 每条记录: 接收时间(int64 纳秒) + 帧类型(uint8, 0 文本 1 二进制) + 长度(uint32) + 原始帧
+MAGIC = b'CCXTWSR1'
+RECORD_HEADER = struct.Struct('<qBI')
+TEXT_FRAME = 0
+BINARY_FRAME = 1
+
+
+class Recorder:
+    # exchange.recorder = Recorder('/data/huobipro.rec')
+    # 压缩帧 (huobipro/biki gzip, okex deflate) 按收到的原样保存, 回放时走同样的解压流程
+    def __init__(self, path, buffering=1 << 20):
+        self.path = path
+        self.file = open(path, 'ab', buffering=buffering)
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        self.count = 0
+
+    def write(self, frame, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time_ns()
+        if isinstance(frame, str):
+            frame = frame.encode()
+            kind = TEXT_FRAME
+        else:
+            kind = BINARY_FRAME
+        self.file.write(RECORD_HEADER.pack(timestamp, kind, len(frame)))
+        self.file.write(frame)
+        self.count += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class FrameReader:
+    # 用 mmap 读取录制文件, 逐条返回 (timestamp_ns, frame), 文本帧为 str, 二进制帧为 bytes
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        if os.fstat(self.file.fileno()).st_size <= len(MAGIC):
+            self.buffer = b''
+        else:
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.buffer[:len(MAGIC)] != MAGIC:
+                self.close()
+                raise ValueError(f"{path} is not a ccxtws recording")
+
+    def __iter__(self):
+        buffer = self.buffer
+        size = len(buffer)
+        offset = len(MAGIC)
+        header_size = RECORD_HEADER.size
+        unpack_from = RECORD_HEADER.unpack_from
+        while offset + header_size <= size:
+            timestamp, kind, length = unpack_from(buffer, offset)
+            offset += header_size
+            if offset + length > size:
+                # 录制进程被中断, 最后一条不完整
+                break
+            frame = buffer[offset:offset + length]
+            offset += length
+            yield timestamp, frame.decode() if kind == TEXT_FRAME else frame
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+async def replay(exchange, path, realtime=False, speed=1.0):
+    # 把录制的帧送回 exchange.on_message, 和线上同样经过解压/解析/notify
+    # realtime 为 True 时按录制时的间隔 (除以 speed) 回放, 否则尽快回放
+    # 返回回放的帧数, 服务器相关的回复 (pong) 会被丢弃
+    count = 0
+    errors = 0
+    loop = asyncio.get_running_loop()
+    current_exchange.set(exchange)
+    with FrameReader(path) as reader:
+        first_timestamp = None
+        start = loop.time()
+        for timestamp, frame in reader:
+            if realtime:
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+                delay = (timestamp - first_timestamp) / 1e9 / speed - (loop.time() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif count % 1000 == 0:
+                # 让 binance diff_depth 快照等后台 task 有机会运行
+                await asyncio.sleep(0)
+            if exchange.backpressure.queues:
+                await exchange.backpressure.wait()
+            try:
+                exchange.on_message(frame)
+            except Exception as e:
+                errors += 1
+                logger.exception(e)
+            count += 1
+    if errors:
+        logger.warning("replay %s: %s of %s frames failed", path, errors, count)
+    return count
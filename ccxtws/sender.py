@@ -0,0 +1,46 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger('ccxtws')
+
+
+class Sender:
+    # 出站消息调度: 按交易所限频发送, pong 这类 urgent 消息插到队头
+    # 发送在独立 task 里进行, 接收循环不会因为限频 sleep 而停止读取
+    def __init__(self, websocket, rate=5):
+        self.websocket = websocket
+        self.interval = 1 / rate if rate > 0 else 0
+        self.queue = deque()
+        self.event = asyncio.Event()
+        self.next_time = 0
+
+    def send(self, msg, urgent=False):
+        if urgent:
+            self.queue.appendleft(msg)
+        else:
+            self.queue.append(msg)
+        self.event.set()
+
+    async def run(self):
+        try:
+            while True:
+                if not self.queue:
+                    self.event.clear()
+                    await self.event.wait()
+                    continue
+                delay = self.next_time - time.monotonic()
+                if delay > 0:
+                    # 等待期间可能有 urgent 消息进来, 醒来后重新取队头
+                    await asyncio.sleep(delay)
+                    continue
+                msg = self.queue.popleft()
+                self.next_time = time.monotonic() + self.interval
+                await self.websocket.send(msg)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(e)
+            # 发送失败时关闭连接, 让接收循环退出并重连
+            await self.websocket.close()
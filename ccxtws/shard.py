@@ -0,0 +1,104 @@
+import asyncio
+from ccxtws.base import ExchangeBoost
+
+
+class ShardedExchange(ExchangeBoost):
+    # 单个连接受 max_observers 限制, 订阅超出时自动新开连接, 对外仍是同一个 subscribe/unsubscribe 接口
+    # ShardedExchange(ccxtws.huobipro)
+    # ShardedExchange(lambda: ccxtws.binance('spot', cfg), max_observers=200)
+    shared_attrs = ('metrics', 'profiler', 'executor', 'book_format', 'codec')
+
+    def __init__(self, factory, max_observers=None, max_shards=0):
+        self.factory = factory
+        # 覆盖每个连接的 max_observers, None 则用交易所默认值
+        self.max_observers = max_observers
+        self.max_shards = max_shards
+        self.shards = []
+        self.observer_shards = {}
+        self.tasks = []
+        self.is_running = False
+        self.metrics = None
+        self.profiler = None
+        self.executor = None
+        # None 表示用每个连接自己的默认值 (factory 里设置的也保留), 赋值后所有连接统一
+        self.book_format = None
+        self.codec = None
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in self.shared_attrs:
+            # 所有连接共用同一份统计
+            for shard in self.shards:
+                setattr(shard, name, value)
+
+    @property
+    def observers(self):
+        return list(self.observer_shards)
+
+    @property
+    def dropped(self):
+        return sum(shard.dropped for shard in self.shards)
+
+    def new_shard(self):
+        if self.max_shards > 0 and len(self.shards) >= self.max_shards:
+            raise RuntimeError(f"max shards limit {self.max_shards}")
+        shard = self.factory()
+        if self.max_observers is not None:
+            shard.max_observers = self.max_observers
+        if self.shards and hasattr(shard, 'exchange'):
+            # binance 等共用一个 ccxt 实例, markets 只加载一次
+            shard.exchange = self.shards[0].exchange
+        for name in self.shared_attrs:
+            value = getattr(self, name)
+            if value is not None:
+                setattr(shard, name, value)
+        self.shards.append(shard)
+        if self.is_running:
+            self.start_shard(shard)
+        return shard
+
+    def start_shard(self, shard):
+        self.tasks.append(asyncio.create_task(shard.run()))
+
+    @staticmethod
+    def is_full(shard):
+        return shard.max_observers > 0 and len(shard.channels) >= shard.max_observers
+
+    def get_shard(self, observer):
+        # 相同 channel 放到同一个连接, 只订阅一次, 不占连接的订阅名额
+        for shard in self.shards:
+            key = shard.get_channel_key(observer.channel)
+            if key is not None and key in shard.channel_observers:
+                return shard
+        # 否则放到订阅最少且未满的连接
+        shard = None
+        for item in self.shards:
+            if self.is_full(item):
+                continue
+            if shard is None or len(item.channels) < len(shard.channels):
+                shard = item
+        if shard is None:
+            shard = self.new_shard()
+        return shard
+
+    def subscribe(self, observer):
+        shard = self.get_shard(observer)
+        shard.subscribe(observer)
+        self.observer_shards[observer] = shard
+
+    def unsubscribe(self, observer):
+        shard = self.observer_shards.pop(observer)
+        shard.unsubscribe(observer)
+
+    def notify(self, data):
+        for shard in self.shards:
+            shard.notify(data)
+
+    async def run(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        for shard in self.shards:
+            self.start_shard(shard)
+        # 和 Exchange.run 一样不会返回, 之后新开的连接由 new_shard 启动
+        await asyncio.get_running_loop().create_future()
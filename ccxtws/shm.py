@@ -0,0 +1,190 @@
+import re
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+from .orderbook import OrderBook
+from . import utils
+
+# 共享内存布局 (小端):
+#   0   magic 8s + depth uint32 + reserved uint32
+#   16  seq uint64, 写入期间为奇数 (seqlock)
+#   24  nonce int64 (没有时为 -1), timestamp int64 (毫秒), ask_count uint32, bid_count uint32
+#   48  ask_prices[depth], ask_volumes[depth], bid_prices[depth], bid_volumes[depth], float64
+# 价格按最优在前排列, bids 也是正价格
+MAGIC = b'CCXTWSM1'
+HEADER = struct.Struct('<8sII')
+SEQ = struct.Struct('<Q')
+STATE = struct.Struct('<qqII')
+SEQ_OFFSET = HEADER.size
+STATE_OFFSET = SEQ_OFFSET + SEQ.size
+LEVELS_OFFSET = STATE_OFFSET + STATE.size
+
+
+def shm_name(exchange, symbol):
+    # ('huobipro', 'BTC/USDT') -> 'ccxtws_huobipro_BTC-USDT'
+    return re.sub(r'[^A-Za-z0-9_.-]', '-', f"ccxtws_{exchange}_{symbol}")
+
+
+def attach(name):
+    # 只读端不能登记到 resource_tracker, 否则读端退出时会把发布端的内存 unlink
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # python 3.13 之前没有 track 参数, attach 期间临时跳过登记
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class BookPublisher:
+    # 把维护好的 book 写进共享内存, 同机的其它进程用 BookReader 读取, 不需要再连交易所
+    # huobipro_observer(exchange, symbol, BookPublisher('huobipro', symbol))
+    # 也可以直接 publisher.publish(order_book)
+    def __init__(self, exchange, symbol, depth=20):
+        self.name = shm_name(exchange, symbol)
+        self.depth = depth
+        size = LEVELS_OFFSET + depth * 4 * 8
+        try:
+            self.shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        except FileExistsError:
+            # 上一次的发布进程没有清理, 复用同名内存
+            self.shm = shared_memory.SharedMemory(name=self.name)
+            if self.shm.size < size:
+                self.shm.close()
+                raise
+        self.buf = self.shm.buf
+        HEADER.pack_into(self.buf, 0, MAGIC, depth, 0)
+        levels = self.buf[LEVELS_OFFSET:LEVELS_OFFSET + depth * 4 * 8].cast('d')
+        self.ask_prices = levels[:depth]
+        self.ask_volumes = levels[depth:depth * 2]
+        self.bid_prices = levels[depth * 2:depth * 3]
+        self.bid_volumes = levels[depth * 3:]
+        self.seq = SEQ.unpack_from(self.buf, SEQ_OFFSET)[0] & ~1
+        self.book = OrderBook(symbol)
+
+    def __call__(self, data):
+        if self.book.apply(data) or not data:
+            self.publish(self.book)
+
+    def publish(self, book, timestamp=None):
+        depth = self.depth
+        asks = book.asks
+        bids = book.bids
+        ask_count = min(depth, len(asks))
+        bid_count = min(depth, len(bids))
+        if timestamp is None:
+            timestamp = int(time.time() * 1000)
+        buf = self.buf
+        self.seq += 1
+        SEQ.pack_into(buf, SEQ_OFFSET, self.seq)
+        self.ask_prices[:ask_count] = asks.keys[:ask_count]
+        self.ask_volumes[:ask_count] = asks.volumes[:ask_count]
+        bid_prices = self.bid_prices
+        for i, key in enumerate(bids.keys[:bid_count]):
+            bid_prices[i] = -key
+        self.bid_volumes[:bid_count] = bids.volumes[:bid_count]
+        nonce = book.nonce if book.nonce is not None else -1
+        STATE.pack_into(buf, STATE_OFFSET, nonce, timestamp, ask_count, bid_count)
+        self.seq += 1
+        SEQ.pack_into(buf, SEQ_OFFSET, self.seq)
+
+    def close(self, unlink=True):
+        self.ask_prices = self.ask_volumes = self.bid_prices = self.bid_volumes = None
+        self.buf = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class BookReader:
+    # reader = BookReader('huobipro', 'BTC/USDT')
+    # if reader.changed(): book = reader.read(5)
+    # 读取时按 seqlock 重试, 保证拿到的是同一次 publish 的完整数据
+    def __init__(self, exchange, symbol):
+        self.symbol = symbol
+        self.shm = attach(shm_name(exchange, symbol))
+        self.buf = self.shm.buf
+        magic, depth, _ = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{self.shm.name} is not a ccxtws book")
+        self.depth = depth
+        self.last_seq = 0
+        # 写入方在 publish 中途退出时 seq 会一直是奇数, 重试超过 timeout 秒抛出 TimeoutError
+        self.timeout = 1.0
+
+    def snapshot(self):
+        # 先整段拷贝再校验 seq, 拷贝窗口短, 写入频繁时也不容易一直重试
+        buf = self.buf
+        size = LEVELS_OFFSET + self.depth * 4 * 8
+        deadline = None
+        while True:
+            seq = SEQ.unpack_from(buf, SEQ_OFFSET)[0]
+            if not seq & 1:
+                data = bytes(buf[STATE_OFFSET:size])
+                if SEQ.unpack_from(buf, SEQ_OFFSET)[0] == seq:
+                    self.last_seq = seq
+                    return seq, data
+            # 只在需要重试时才取时间
+            if deadline is None:
+                deadline = time.monotonic() + self.timeout
+            elif time.monotonic() > deadline:
+                raise TimeoutError(f"{self.shm.name} is being written for more than {self.timeout}s, writer may have died")
+            time.sleep(0)
+
+    @property
+    def seq(self):
+        return SEQ.unpack_from(self.buf, SEQ_OFFSET)[0]
+
+    def changed(self):
+        return self.seq != self.last_seq
+
+    def read(self, depth=None):
+        # 返回 {'full': True, 'asks', 'bids', 'nonce', 'timestamp', 'seq'}, 和 observer 的数据格式一致
+        seq, data = self.snapshot()
+        nonce, timestamp, ask_count, bid_count = STATE.unpack_from(data)
+        if depth is not None:
+            ask_count = min(depth, ask_count)
+            bid_count = min(depth, bid_count)
+        levels = memoryview(data)[STATE.size:].cast('d')
+        n = self.depth
+        asks = [[levels[i], levels[n + i]] for i in range(ask_count)]
+        bids = [[levels[n * 2 + i], levels[n * 3 + i]] for i in range(bid_count)]
+        return {'full': True, 'asks': asks, 'bids': bids,
+                'nonce': None if nonce < 0 else nonce, 'timestamp': timestamp, 'seq': seq}
+
+    def read_numpy(self, depth=None):
+        # 同 read, asks/bids 为 (n, 2) float64 ndarray
+        np = utils.np
+        if np is None:
+            raise ImportError("BookReader.read_numpy requires numpy")
+        seq, data = self.snapshot()
+        nonce, timestamp, ask_count, bid_count = STATE.unpack_from(data)
+        if depth is not None:
+            ask_count = min(depth, ask_count)
+            bid_count = min(depth, bid_count)
+        levels = np.frombuffer(data, dtype=np.float64, offset=STATE.size).reshape(4, self.depth)
+        asks = np.column_stack((levels[0, :ask_count], levels[1, :ask_count]))
+        bids = np.column_stack((levels[2, :bid_count], levels[3, :bid_count]))
+        return {'full': True, 'asks': asks, 'bids': bids,
+                'nonce': None if nonce < 0 else nonce, 'timestamp': timestamp, 'seq': seq}
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,5 +1,50 @@
 import random
+import time
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 def get_req_id():
     return random.randint(100000000, 999999999)
+
+
+# iso8601 按秒缓存的前缀, 同一帧里的 ticker/trade 时间戳大多在同一秒
+_iso8601_cache = [None, '']
+
+
+def iso8601(timestamp):
+    # 1557127179348 -> '2019-05-06T07:19:39.348Z', 和 ccxt 的 Exchange.iso8601 结果相同
+    if timestamp is None:
+        return None
+    seconds, millis = divmod(int(timestamp), 1000)
+    cache = _iso8601_cache
+    if cache[0] != seconds:
+        cache[1] = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))
+        cache[0] = seconds
+    return f"{cache[1]}.{millis:03d}Z"
+
+
+def iso8601_to_ms(value):
+    # '2019-05-06T07:19:39.348Z' -> 1557127179348
+    if not value:
+        return None
+    return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp() * 1000)
+
+
+def levels_to_ndarray(items, price_key=0, volume_key=1):
+    # 一次转换成 (n, 2) float64 连续数组, 第 0 列价格, 第 1 列数量
+    if np is None:
+        raise ImportError("book_format 'numpy' requires numpy")
+    if len(items) == 0:
+        return np.empty((0, 2), dtype=np.float64)
+    if price_key == 0 and volume_key == 1 and not isinstance(items[0], dict):
+        levels = np.array(items, dtype=np.float64)
+        if levels.shape[1] != 2:
+            # okex 每档还带订单数等字段
+            levels = np.ascontiguousarray(levels[:, :2])
+        return levels
+    return np.array([(item[price_key], item[volume_key]) for item in items], dtype=np.float64)
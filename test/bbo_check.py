@@ -0,0 +1,74 @@
+import asyncio
+import ccxt
+import ccxtws
+from ccxtws import mock
+
+
+# 原生盘口 channel 的检查: 和深度共用一个连接, 只在最优价或数量变化时收到 BBO, 退订后不再收到
+def make_ws(venue, server, exchange):
+    if venue == 'binance':
+        ws = ccxtws.binance()
+        ws.exchange.set_markets(mock.make_markets(venue, 2))
+        ws.build_symbol_map()
+        ws.markets_loaded_at = 1e18
+    else:
+        ws = getattr(ccxtws, venue)()
+    ws.ws_uri = server.ws_uri
+    if venue == 'kucoin':
+        exchange.publicPostBulletPublic = server.bullet_public
+    return ws
+
+
+def make_observer(venue, exchange, symbol, callback, feed_type):
+    if venue == 'binance':
+        if feed_type == 'depth':
+            return ccxtws.binance_observer("order_book", {"symbol": symbol, "levels": 5}, callback)
+        return ccxtws.binance_observer("bbo", {"symbol": symbol}, callback)
+    return getattr(ccxtws, f"{venue}_observer")(exchange, symbol, callback, feed_type)
+
+
+async def check(venue):
+    server = mock.servers[venue](rate=50)
+    await server.start()
+    exchange = ccxt.binance()
+    exchange.set_markets(mock.make_markets(venue, 2))
+    ws = make_ws(venue, server, exchange)
+    bbos = []
+    books = []
+    bbo_observer = make_observer(venue, exchange, 'COIN0/USDT', bbos.append, 'bbo')
+    ws.subscribe(bbo_observer)
+    ws.subscribe(make_observer(venue, exchange, 'COIN0/USDT', books.append, 'depth'))
+    task = asyncio.create_task(ws.run())
+    try:
+        await asyncio.sleep(1)
+        assert bbos and books, (venue, len(bbos), len(books))
+        for bbo in bbos:
+            assert isinstance(bbo, ccxtws.BBO), bbo
+            assert bbo.symbol == 'COIN0/USDT' and bbo.bid < bbo.ask and bbo.timestamp, bbo
+        for prev, bbo in zip(bbos, bbos[1:]):
+            assert prev[1:5] != bbo[1:5], (prev, bbo)
+        # 服务器为盘口和深度各维护一个 channel
+        channels = next(iter(server.connections)).channels
+        assert len(channels) == 2, list(channels)
+        ws.unsubscribe(bbo_observer)
+        await asyncio.sleep(0.2)
+        assert len(channels) == 1, list(channels)
+        count = len(bbos)
+        await asyncio.sleep(0.3)
+        assert len(bbos) == count
+    finally:
+        task.cancel()
+        if venue == 'binance':
+            ws.markets_task.cancel()
+            await ws.exchange.close()
+        await server.stop()
+    print(f"{venue} bbo ok: {count} BBO, {len(books)} depth")
+
+
+async def main():
+    for venue in ('binance', 'huobipro', 'okex', 'kucoin'):
+        await check(venue)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
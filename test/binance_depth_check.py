@@ -0,0 +1,146 @@
+import asyncio
+import ccxtws
+from ccxtws import mock
+from ccxtws.orderbook import OrderBook
+
+
+# binance diff_depth 和快照对齐的检查: 现货/合约的对齐规则, 断档重新同步, REST 失败时的退避和缓存上限
+def make_markets(count):
+    # 和真实的 binance 一样, 现货和 U 本位永续的 market id 相同 (COIN0USDT)
+    markets = mock.make_markets('binance', count)
+    for market in list(markets):
+        markets.append(dict(market, symbol=market['symbol'] + ':USDT', settle='USDT', settleId='USDT',
+                            type='swap', spot=False, swap=True, contract=True, linear=True, inverse=False))
+    return markets
+
+
+def make_ws(ws_type='spot'):
+    ws = ccxtws.binance(ws_type)
+    ws.exchange.set_markets(make_markets(2))
+    ws.build_symbol_map()
+    return ws
+
+
+def synced_book(ws, market_id, nonce):
+    book = ws.order_books[market_id] = OrderBook(ws.get_symbol(market_id))
+    book.asks.replace([[1.0, 1.0]])
+    book.bids.replace([[0.5, 1.0]])
+    book.nonce = nonce
+    book.is_synced = True
+    ws.unaligned_books.add(market_id)
+    return book
+
+
+def event(first_id, last_id, prev_id=None):
+    data = {'e': 'depthUpdate', 'E': 0, 's': 'COIN0USDT', 'U': first_id, 'u': last_id,
+            'a': [['1.0', '2.0']], 'b': []}
+    if prev_id is not None:
+        data['pu'] = prev_id
+    return data
+
+
+def check_alignment():
+    ws = make_ws()
+    # 现货: 丢弃 u <= lastUpdateId, 第一条需要 U <= lastUpdateId + 1 <= u
+    for first_id, last_id, expected in [(95, 100, False), (99, 103, 'applied'), (101, 103, 'applied'), (102, 103, None)]:
+        book = synced_book(ws, 'COIN0USDT', 100)
+        result = ws.apply_depth_event('COIN0USDT', book, event(first_id, last_id))
+        assert (result if result in (False, None) else 'applied') == expected, ('spot', first_id, last_id, result)
+    # 之后必须连续
+    book = synced_book(ws, 'COIN0USDT', 100)
+    assert ws.apply_depth_event('COIN0USDT', book, event(101, 103))
+    assert ws.apply_depth_event('COIN0USDT', book, event(105, 106)) is None
+
+    ws = make_ws('future_u')
+    # 合约: 丢弃 u < lastUpdateId, 第一条需要 U <= lastUpdateId <= u
+    for first_id, last_id, prev_id, expected in [(90, 99, 89, False), (98, 100, 97, 'applied'),
+                                                 (99, 103, 98, 'applied'), (101, 103, 99, None)]:
+        book = synced_book(ws, 'COIN0USDT', 100)
+        result = ws.apply_depth_event('COIN0USDT', book, event(first_id, last_id, prev_id))
+        assert (result if result in (False, None) else 'applied') == expected, ('future', first_id, last_id, result)
+    # 之后 pu 必须等于上一条 u
+    book = synced_book(ws, 'COIN0USDT', 100)
+    assert ws.apply_depth_event('COIN0USDT', book, event(99, 103, 98))
+    assert ws.apply_depth_event('COIN0USDT', book, event(106, 108, 103))
+    assert ws.apply_depth_event('COIN0USDT', book, event(109, 110, 107)) is None
+    print("alignment ok")
+
+
+async def check_live(futures):
+    # 连 mock 服务器, 本地维护的深度要和服务器一致, 中途清空本地深度模拟断档
+    server = mock.binance_server(rate=50, symbols=2, futures=futures)
+    await server.start()
+    ws = make_ws('future_u' if futures else 'spot')
+    ws.ws_uri = server.ws_uri
+    ws.markets_loaded_at = 1e18
+    symbol = 'COIN0/USDT:USDT' if futures else 'COIN0/USDT'
+    calls = []
+
+    async def fetch_order_book(request_symbol, limit=None, params={}):
+        # 合约模式不能拿到现货的快照, 反之亦然
+        assert request_symbol == symbol, (request_symbol, symbol)
+        calls.append(request_symbol)
+        return await server.fetch_order_book(request_symbol, limit, params)
+    ws.exchange.fetch_order_book = fetch_order_book
+    books = []
+    ws.subscribe(ccxtws.binance_observer("diff_depth", {"symbol": symbol}, ccxtws.book_callback(books.append)))
+    task = asyncio.create_task(ws.run())
+    try:
+        for round in range(2):
+            await asyncio.sleep(1)
+            assert calls and books, "no depth data"
+            book = ws.order_books['COIN0USDT']
+            server_book = next(iter(server.connections)).channels['coin0usdt@depth@100ms']
+            # 等本地处理完已经发出的增量再比较
+            for _ in range(100):
+                if book.nonce == server_book.seq:
+                    break
+                await asyncio.sleep(0)
+            asks, bids = server_book.current()
+            assert book.asks.levels() == [[float(p), float(v)] for p, v in asks], "asks mismatch"
+            assert book.bids.levels() == [[float(p), float(v)] for p, v in bids], "bids mismatch"
+            # 序号断开, 下一条增量触发重新同步
+            book.nonce -= 10
+    finally:
+        task.cancel()
+        ws.markets_task.cancel()
+        await server.stop()
+        await ws.exchange.close()
+    print(f"{'future' if futures else 'spot'} live sync ok")
+
+
+async def check_rest_outage():
+    ws = make_ws()
+    ws.depth_buffer_limit = 50
+    ws.depth_retry_delay = 0.2
+    calls = []
+
+    async def fetch_order_book(symbol, limit=None, params={}):
+        assert symbol == 'COIN0/USDT', symbol
+        calls.append(symbol)
+        raise RuntimeError("rest down")
+    ws.exchange.fetch_order_book = fetch_order_book
+    ws.subscribe(ccxtws.binance_observer("diff_depth", {"symbol": "COIN0/USDT"}, lambda data: None))
+    ws.reindex()
+    try:
+        for i in range(200):
+            ws.notify({'stream': 'coin0usdt@depth@100ms', 'data': event(i * 2 + 1, i * 2 + 2)})
+            await asyncio.sleep(0.005)
+        # 约 1 秒内: 首次 + 0.2 + 0.4 后的重试, 而不是每条增量一次
+        assert len(calls) <= 4, calls
+        assert len(ws.depth_buffers['COIN0USDT']) == 50
+    finally:
+        ws.reset_order_books()
+        await ws.exchange.close()
+    print(f"rest outage ok: {len(calls)} snapshot requests for 200 events")
+
+
+async def main():
+    check_alignment()
+    await check_live(False)
+    await check_live(True)
+    await check_rest_outage()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
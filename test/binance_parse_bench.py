@@ -0,0 +1,74 @@
+import asyncio
+import math
+import time
+import ccxtws
+
+
+# binance trade/ticker 快速解析和 ccxt 解析流程的结果对比及吞吐
+def make_markets(count):
+    markets = []
+    for i in range(count):
+        base = f"COIN{i}"
+        markets.append({
+            'id': f"{base}USDT", 'lowercaseId': f"{base.lower()}usdt", 'symbol': f"{base}/USDT",
+            'base': base, 'quote': 'USDT', 'baseId': base, 'quoteId': 'USDT',
+            'type': 'spot', 'spot': True, 'info': {},
+        })
+    return markets
+
+
+def make_ticker(i):
+    return {"e": "24hrTicker", "E": 1672515782136 + i, "s": f"COIN{i}USDT", "p": "0.0015", "P": "250.00",
+            "w": "0.0018", "x": "0.0009", "c": f"{0.0025 + i:.4f}", "Q": "10", "b": "0.0024", "B": "10",
+            "a": "0.0026", "A": "100", "o": "0.0010", "h": "0.0025", "l": "0.0010", "v": "10000", "q": "18",
+            "O": 0, "C": 1672515782000 + i, "F": 0, "L": 18150, "n": 18151}
+
+
+def make_trade(i):
+    return {"stream": "coin1usdt@aggTrade", "data": {
+        "e": "aggTrade", "E": 1672515782136, "s": "COIN1USDT", "a": 12345 + i, "p": "16543.21", "q": "0.0137",
+        "f": 100, "l": 105, "T": 1672515782130 + i, "m": i % 2 == 0, "M": True}}
+
+
+def assert_same(fast, slow):
+    assert set(fast) == set(slow), (fast, slow)
+    for key, value in slow.items():
+        if isinstance(value, float):
+            assert math.isclose(fast[key], value, rel_tol=1e-12), (key, fast[key], value)
+        else:
+            assert fast[key] == value, (key, fast[key], value)
+
+
+def bench(func, arg, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(arg, {})
+    return rounds / (time.perf_counter() - start)
+
+
+async def main():
+    ws = ccxtws.binance()
+    ws.exchange.set_markets(make_markets(2000))
+    try:
+        tickers = {"stream": "!ticker@arr", "data": [make_ticker(i) for i in range(2000)]}
+        fast = ws.parse_tickers(tickers)
+        slow = ws.ccxt_parse_tickers(tickers)
+        assert fast.keys() == slow.keys()
+        for symbol in slow:
+            assert_same(fast[symbol], slow[symbol])
+        trades = [make_trade(i) for i in range(100)]
+        for trade in trades:
+            assert_same(ws.parse_trade(trade, {}), ws.ccxt_parse_trade(trade, {}))
+
+        for name, fast_func, slow_func, arg, rounds in [
+                ("tickers(2000)", ws.parse_tickers, ws.ccxt_parse_tickers, tickers, 20),
+                ("trade", ws.parse_trade, ws.ccxt_parse_trade, trades[0], 20000)]:
+            fast_rate = bench(fast_func, arg, rounds)
+            slow_rate = bench(slow_func, arg, rounds)
+            print(f"{name:14s} ccxt {slow_rate:10.0f}/s  fast {fast_rate:10.0f}/s  x{fast_rate / slow_rate:.1f}")
+    finally:
+        await ws.exchange.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
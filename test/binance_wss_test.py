@@ -17,6 +17,17 @@ def ws_tickers(ws_api):
     ws_api.subscribe(observer)
     asyncio.get_event_loop().run_until_complete(ws_api.run())
 
+# 只推送有变化的 tickers, 可以用 symbols 过滤
+def ws_changed_tickers(ws_api):
+    tickers = {}
+    def _callback(rsp):
+        tickers.update(rsp)
+        print(len(rsp), len(tickers))
+
+    observer = ccxtws.binance_observer("changed_tickers", {"symbols": ["BTC/USDT", "ETH/USDT"]}, _callback)
+    ws_api.subscribe(observer)
+    asyncio.get_event_loop().run_until_complete(ws_api.run())
+
 # order book
 def ws_order_book(ws_api):
     ob = {}
@@ -30,6 +41,16 @@ def ws_order_book(ws_api):
     ws_api.subscribe(observer)
     asyncio.get_event_loop().run_until_complete(ws_api.run())
 
+# diff depth, 本地维护全量深度
+def ws_diff_depth(ws_api):
+    def _callback(rsp):
+        book = ws_api.order_books["BTCUSDT"]
+        print(rsp['full'], book.best_bid(), book.best_ask())
+
+    observer = ccxtws.binance_observer("diff_depth", {"symbol": "BTC/USDT"}, _callback)
+    ws_api.subscribe(observer)
+    asyncio.get_event_loop().run_until_complete(ws_api.run())
+
 # # order book
 # async def ws_order_book(ws_api):
 #     ob = {}
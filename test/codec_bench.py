@@ -0,0 +1,77 @@
+import json
+import time
+from ccxtws.codec import available_codecs, get_codec
+
+
+# 各交易所解压后的典型帧, 对比不同 json 实现的解析速度
+def depth_levels(n, price=100.0, key=None):
+    levels = [[f"{price + i * 0.01:.2f}", f"{1 + i * 0.137:.6f}"] for i in range(n)]
+    if key is not None:
+        levels = [{key[0]: p, key[1]: v} for p, v in levels]
+    return levels
+
+
+def binance_ticker(i):
+    return {"e": "24hrTicker", "E": 1672515782136, "s": f"COIN{i}USDT", "p": "0.0015", "P": "250.00",
+            "w": "0.0018", "x": "0.0009", "c": "0.0025", "Q": "10", "b": "0.0024", "B": "10", "a": "0.0026",
+            "A": "100", "o": "0.0010", "h": "0.0025", "l": "0.0010", "v": "10000", "q": "18", "O": 0,
+            "C": 86400000, "F": 0, "L": 18150, "n": 18151}
+
+
+frames = {
+    'binance_depth': {"stream": "btcusdt@depth20@100ms", "data": {
+        "lastUpdateId": 160, "bids": depth_levels(20), "asks": depth_levels(20, 101)}},
+    'binance_trade': {"stream": "btcusdt@aggTrade", "data": {
+        "e": "aggTrade", "E": 123456789, "s": "BTCUSDT", "a": 12345, "p": "0.001", "q": "100",
+        "f": 100, "l": 105, "T": 123456785, "m": True, "M": True}},
+    'binance_tickers': {"stream": "!ticker@arr", "data": [binance_ticker(i) for i in range(2000)]},
+    'huobipro': {"ch": "market.btcusdt.mbp.refresh.5", "ts": 1573199608679, "tick": {
+        "seqNum": 100020142010, "bids": [[618.37, 71.594], [423.33, 77.726], [223.18, 47.997]],
+        "asks": [[650.59, 14.909733438479636], [650.63, 97.996], [650.77, 97.465]]}},
+    'okex': {"table": "spot/depth5", "data": [{
+        "instrument_id": "BTC-USDT", "asks": [level + ["1"] for level in depth_levels(5, 101)],
+        "bids": [level + ["1"] for level in depth_levels(5)], "timestamp": "2019-05-06T07:19:39.348Z"}]},
+    'kucoin': {"type": "message", "topic": "/spotMarket/level2Depth5:BTC-USDT", "subject": "level2", "data": {
+        "asks": depth_levels(5, 101), "bids": depth_levels(5), "timestamp": 1586948108193}},
+    'gateio': {"method": "depth.update", "params": [True, {
+        "asks": depth_levels(5, 101), "bids": depth_levels(5)}, "BTC_USDT"], "id": None},
+    'coinex': {"method": "depth.update", "params": [False, {
+        "asks": depth_levels(3, 101), "bids": depth_levels(2)}, "BTCUSDT"], "id": None},
+    'poloniex': [121, 8768, [["o", 0, "0.00001823", "5534.6474"], ["o", 1, "0.00001820", "0.00000000"],
+                             ["t", "42706057", 1, "0.05567134", "0.00181421", 1522877119]]],
+    'mxc': ["push.symbol", {"symbol": "BTC_USDT", "data": {
+        "asks": depth_levels(3, 101, ('p', 'q')), "bids": depth_levels(3, key=('p', 'q'))}}],
+    'ascendex': {"m": "depth", "symbol": "BTC/USDT", "data": {
+        "ts": 1573069021376, "seqnum": 2097965, "asks": depth_levels(3, 101), "bids": depth_levels(3)}},
+    'hitbtc': {"jsonrpc": "2.0", "method": "updateOrderbook", "params": {
+        "ask": depth_levels(3, 101, ('price', 'size')), "bid": depth_levels(3, key=('price', 'size')),
+        "symbol": "BTCUSDT", "sequence": 8073830, "timestamp": "2018-11-19T05:00:28.700Z"}},
+    'bibox': {"bids": depth_levels(10, key=('price', 'volume')), "asks": depth_levels(10, 101, ('price', 'volume')),
+              "pair": "BTC_USDT", "update_time": 1547718012906},
+    'biki': {"channel": "market_btcusdt_depth_step0", "ts": 1506584998239, "tick": {
+        "asks": depth_levels(5, 101), "buys": depth_levels(5)}},
+}
+
+
+def bench(codec, raw, seconds=0.3):
+    loads = codec.loads
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(100):
+            loads(raw)
+        count += 100
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return count / elapsed
+
+
+if __name__ == "__main__":
+    names = available_codecs()
+    print(f"{'frame':16s} {'bytes':>8s} " + " ".join(f"{name:>12s}" for name in names))
+    for frame_name, frame in frames.items():
+        raw = json.dumps(frame).encode()
+        for name in names:
+            assert get_codec(name).loads(raw) == frame
+        rates = [bench(get_codec(name), raw) for name in names]
+        print(f"{frame_name:16s} {len(raw):8d} " + " ".join(f"{rate:10.0f}/s" for rate in rates))
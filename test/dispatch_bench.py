@@ -0,0 +1,77 @@
+import time
+import ccxtws
+from ccxtws.base import ExchangeObserver
+
+
+# notify 分发性能: 不同 observer 数量下每秒处理的消息数
+class bench_observer(ExchangeObserver):
+    def __init__(self, channel):
+        self.channel = channel
+        self.count = 0
+
+    def update(self, data):
+        self.count += 1
+
+
+def okex_message(instrument_id):
+    return {"table": "spot/depth5", "data": [{
+        "instrument_id": instrument_id,
+        "asks": [["8.8", "96.99999966", "1"], ["9", "39", "3"], ["9.5", "100", "2"], ["12", "12", "1"], ["95", "0.42973686", "3"]],
+        "bids": [["7.6", "0.00300078", "1"], ["7.5", "53.5", "1"], ["7", "49.57", "1"], ["6.8", "18.7", "2"], ["6.5", "2", "1"]],
+        "timestamp": "2019-05-06T07:19:39.348Z"}]}
+
+
+def huobipro_message(market_id):
+    return {"ch": f"market.{market_id}.mbp.refresh.5", "ts": 1573199608679, "tick": {
+        "seqNum": 100020142010,
+        "bids": [[618.37, 71.594], [423.33, 77.726], [223.18, 47.997], [219.34, 24.82], [210.34, 94.463]],
+        "asks": [[650.59, 14.909733438479636], [650.63, 97.996], [650.77, 97.465], [651.23, 83.973], [651.42, 34.465]]}}
+
+
+def binance_message(stream):
+    return {"stream": stream, "data": {
+        "lastUpdateId": 160,
+        "bids": [["0.0024", "10"], ["0.0023", "100"], ["0.0022", "30"], ["0.0021", "4"], ["0.0020", "9"]],
+        "asks": [["0.0026", "100"], ["0.0027", "10"], ["0.0028", "15"], ["0.0029", "11"], ["0.0030", "1"]]}}
+
+
+def setup_okex(n):
+    ws = ccxtws.okex()
+    channels = [f"COIN{i}-USDT" for i in range(n)]
+    return ws, channels, [okex_message(channel) for channel in channels]
+
+
+def setup_huobipro(n):
+    ws = ccxtws.huobipro()
+    channels = [f"coin{i}usdt" for i in range(n)]
+    return ws, channels, [huobipro_message(channel) for channel in channels]
+
+
+def setup_binance(n):
+    ws = ccxtws.binance()
+    ws.parse_order_book = lambda data, params: data['data']
+    channels = []
+    for i in range(n):
+        stream = f"coin{i}usdt@depth5@100ms"
+        channels.append(dict(feed_type="order_book", params={"symbol": f"coin{i}usdt", "levels": 5}, stream=stream))
+    return ws, channels, [binance_message(channel["stream"]) for channel in channels]
+
+
+def run(name, setup, n, rounds=20000):
+    ws, channels, messages = setup(n)
+    ws.max_observers = -1
+    observers = [bench_observer(channel) for channel in channels]
+    for observer in observers:
+        ws.subscribe(observer)
+    start = time.perf_counter()
+    for i in range(rounds):
+        ws.notify(messages[i % n])
+    elapsed = time.perf_counter() - start
+    assert sum(observer.count for observer in observers) == rounds
+    print(f"{name:10s} observers={n:5d} {rounds / elapsed:12.0f} msg/s")
+
+
+if __name__ == "__main__":
+    for name, setup in [("okex", setup_okex), ("huobipro", setup_huobipro), ("binance", setup_binance)]:
+        for n in [10, 100, 1000]:
+            run(name, setup, n)
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+import ccxt
+import ccxtws
+from ccxtws import mock
+
+
+# 用 ccxtws.mock 的本地服务器压测各交易所 adapter, 服务器跑在子进程里, CPU 统计只包含客户端
+# python test/soak_bench.py --exchanges huobipro okex --rates 10 100 --symbols 1 10 --duration 10 --json out.json
+def serve(venue, rate, symbols, conn):
+    async def main():
+        server = mock.servers[venue](rate=rate, symbols=symbols)
+        await server.start()
+        conn.send(server.ws_uri)
+        await asyncio.get_running_loop().create_future()
+    asyncio.run(main())
+
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class LatencySamples:
+    # 蓄水池采样, 长时间运行内存不增长
+    def __init__(self, size=100000):
+        self.size = size
+        self.samples = []
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if len(self.samples) < self.size:
+            self.samples.append(value)
+        else:
+            i = random.randrange(self.count)
+            if i < self.size:
+                self.samples[i] = value
+
+    def percentile(self, p):
+        if not self.samples:
+            return None
+        samples = sorted(self.samples)
+        return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+def make_exchange(venue, ws_uri, count):
+    # 统一用 ShardedExchange, 订阅数超过 adapter 的 max_observers 时自动开多条连接
+    markets = mock.make_markets(venue, count)
+    symbols = [market['symbol'] for market in markets]
+    if venue == 'binance':
+        exchange = ccxtws.binance().exchange
+        exchange.set_markets(markets)
+
+        async def load_markets(*args, **kwargs):
+            return exchange.markets
+        exchange.load_markets = load_markets
+
+        def factory():
+            ws = ccxtws.binance()
+            ws.exchange = exchange
+            ws.ws_uri = ws_uri
+            return ws
+
+        def make_observer(symbol, callback):
+            return ccxtws.binance_observer("order_book", {"symbol": symbol, "levels": 5}, callback)
+    else:
+        exchange = ccxt.binance()
+        exchange.set_markets(markets)
+        if venue == 'kucoin':
+            async def bullet_public(params={}):
+                return {'data': {'token': 'mock', 'instanceServers': [{'endpoint': ws_uri, 'pingInterval': 18000}]}}
+            exchange.publicPostBulletPublic = bullet_public
+
+        def factory():
+            ws = getattr(ccxtws, venue)()
+            ws.ws_uri = ws_uri
+            return ws
+
+        def make_observer(symbol, callback):
+            return getattr(ccxtws, f"{venue}_observer")(exchange, symbol, callback)
+    ws = ccxtws.ShardedExchange(factory)
+    return ws, symbols, make_observer
+
+
+async def run_case(venue, rate, count, duration):
+    parent_conn, child_conn = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=serve, args=(venue, rate, count, child_conn), daemon=True)
+    server.start()
+    try:
+        ws_uri = parent_conn.recv()
+        ws, symbols, make_observer = make_exchange(venue, ws_uri, count)
+        latencies = LatencySamples()
+        state = {'messages': 0, 'recv_time': 0.0}
+
+        def callback(data):
+            if data:
+                state['messages'] += 1
+                latencies.add(time.perf_counter() - state['recv_time'])
+
+        for symbol in symbols:
+            ws.subscribe(make_observer(symbol, callback))
+        for shard in ws.shards:
+            # 记录每帧的接收时间, 用来计算 recv -> callback 延迟
+            def instrument(shard):
+                recv = shard.recv
+
+                async def timed_recv(websocket):
+                    resp = await recv(websocket)
+                    state['recv_time'] = time.perf_counter()
+                    return resp
+                shard.recv = timed_recv
+            instrument(shard)
+
+        task = asyncio.create_task(ws.run())
+        # 预热: 连接建立和订阅完成
+        await asyncio.sleep(min(2, duration / 4))
+        start_messages = state['messages']
+        start_rss = rss_bytes()
+        start_cpu = time.process_time()
+        start = time.perf_counter()
+        peak_rss = start_rss
+        # 每秒采样一次 RSS, 长时间运行时看峰值和增长
+        while time.perf_counter() - start < duration:
+            await asyncio.sleep(min(1, duration - (time.perf_counter() - start)))
+            peak_rss = max(peak_rss, rss_bytes())
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - start_cpu
+        messages = state['messages'] - start_messages
+        task.cancel()
+        for shard_task in ws.tasks:
+            shard_task.cancel()
+        p50 = latencies.percentile(50)
+        p99 = latencies.percentile(99)
+        return {
+            'exchange': venue,
+            'rate': rate,
+            'symbols': count,
+            'connections': len(ws.shards),
+            'duration': round(elapsed, 3),
+            'messages': messages,
+            'messages_per_sec': round(messages / elapsed, 1),
+            'cpu_us_per_message': round(cpu / messages * 1e6, 2) if messages else None,
+            'latency_p50_us': round(p50 * 1e6, 1) if p50 is not None else None,
+            'latency_p99_us': round(p99 * 1e6, 1) if p99 is not None else None,
+            'rss_growth_bytes': rss_bytes() - start_rss,
+            'rss_peak_growth_bytes': peak_rss - start_rss,
+        }
+    finally:
+        server.terminate()
+        server.join()
+
+
+async def main(args):
+    results = []
+    for venue in args.exchanges:
+        for count in args.symbols:
+            for rate in args.rates:
+                result = await run_case(venue, rate, count, args.duration)
+                results.append(result)
+                print(json.dumps(result), file=sys.stderr)
+    output = json.dumps({'ccxtws_bench': 1, 'python': sys.version.split()[0], 'results': results}, indent=2)
+    if args.json:
+        with open(args.json, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--exchanges', nargs='+', default=list(mock.servers))
+    parser.add_argument('--rates', nargs='+', type=int, default=[10, 100])
+    parser.add_argument('--symbols', nargs='+', type=int, default=[1, 10])
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--json', help='machine readable output path')
+    asyncio.run(main(parser.parse_args()))